@@ -0,0 +1,265 @@
+import re
+from collections import Counter, defaultdict
+
+# Common Malaysian address words and their abbreviations; both spellings normalize to the short form
+ABBREVIATIONS = {
+    "JALAN": "JLN",
+    "TAMAN": "TMN",
+    "LORONG": "LRG",
+    "KAMPUNG": "KG",
+    "KAMPONG": "KG",
+    "BANDAR": "BDR",
+    "BUKIT": "BKT",
+    "SUNGAI": "SG",
+    "PERSIARAN": "PSRN",
+    "LEBUHRAYA": "LEBUHRAYA",
+    "LEBUH": "LBH",
+    "SEKSYEN": "SEK",
+    "SECTION": "SEK",
+    "APARTMENT": "APT",
+    "PANGSAPURI": "PPR",
+    "KONDOMINIUM": "KONDO",
+    "CONDOMINIUM": "KONDO",
+    "NOMBOR": "NO",
+    "NUMBER": "NO",
+    "MOHAMMAD": "MOHD",
+    "MOHAMED": "MOHD",
+    "MUHAMMAD": "MUHD",
+    "ABDUL": "ABD",
+}
+TOKEN_PATTERN = re.compile(r"[A-Z]+|\d+")
+
+# Default score above which a name or address counts as present
+DEFAULT_THRESHOLD = 0.85
+
+
+# Function to normalize text into comparable tokens: upper case, punctuation and spacing
+# dropped, letters and digits split apart ("No.1" -> NO 1) and abbreviations unified
+def tokenize(text):
+    return [ABBREVIATIONS.get(token, token) for token in TOKEN_PATTERN.findall(text.upper())]
+
+
+# Function to list the padded character trigrams of a token
+def trigrams(token):
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Function to compute the edit distance between two tokens, giving up once it exceeds max_distance
+def edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+# Function to decide how many OCR errors a token may contain (numbers and short words must match exactly)
+def allowed_edits(token):
+    if token.isdigit() or len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 7 else 2
+
+
+# Function to align the query tokens in order with the document positions start..start+length-1.
+# similarities maps a position to {query token: similarity}; a number in the query may not be
+# skipped, so the alignment fails (returns None) unless every number is found in sequence
+def align_tokens(query_tokens, similarities, start, length):
+    impossible = float("-inf")
+    # best[j]: best total similarity of the query tokens so far aligned within the first j positions
+    best = [0.0] * (length + 1)
+    for token in query_tokens:
+        skip = impossible if token.isdigit() else 0.0
+        current = [best[0] + skip]
+        for j in range(1, length + 1):
+            similarity = similarities.get(start + j - 1, {}).get(token, 0.0)
+            aligned = best[j - 1] + similarity if similarity else impossible
+            current.append(max(best[j] + skip, current[j - 1], aligned))
+        best = current
+    return best[-1] if best[-1] != impossible else None
+
+
+# Function to find where an alignment may start: within length positions before an occurrence of the
+# query's rarest number (every run must align it), or of its rarest token found in this document
+def anchored_starts(query_tokens, similarities, length):
+    positions = defaultdict(list)  # query token -> positions it matched
+    for position, matched in similarities.items():
+        for token in matched:
+            positions[token].append(position)
+
+    numbers = [token for token in query_tokens if token.isdigit()]
+    if any(token not in positions for token in numbers):
+        return []
+    candidates = numbers or [token for token in query_tokens if token in positions]
+    anchor = min(candidates, key=lambda token: len(positions[token]))
+
+    # A run starting on an unmatched position scores no better than one starting at its first match
+    return sorted({start for position in positions[anchor]
+                   for start in range(position - length + 1, position + 1) if start in similarities})
+
+
+class TokenIndex:
+    """
+    Inverted index of normalized tokens (with their positions) over many documents, with
+    a trigram index over the vocabulary for OCR-tolerant lookups.
+
+    A query is scored against every indexed document at once: each distinct query token is
+    looked up a single time (exactly, then within a small edit distance), so matching many
+    documents costs about as much as the query's vocabulary, not documents times patterns.
+
+    Parameters:
+        slack (int): Extra document tokens allowed inside a match (e.g. "1/2" for "1").
+    """
+
+    def __init__(self, slack=2):
+        self.slack = slack
+        self.postings = defaultdict(lambda: defaultdict(list))  # token -> {doc_id: [positions]}
+        self.vocabulary_trigrams = defaultdict(set)  # trigram -> tokens
+        self._expansions = {}
+
+    def add(self, doc_id, text):
+        for position, token in enumerate(tokenize(text)):
+            if token not in self.postings:
+                for trigram in trigrams(token):
+                    self.vocabulary_trigrams[trigram].add(token)
+            self.postings[token][doc_id].append(position)
+        self._expansions.clear()
+        return self
+
+    # Function to find the indexed tokens a query token can match, with their similarity (memoized)
+    def expand(self, token):
+        expansion = self._expansions.get(token)
+        if expansion is not None:
+            return expansion
+
+        expansion = {token: 1.0} if token in self.postings else {}
+        max_edits = allowed_edits(token)
+        if max_edits:
+            # Candidates must share enough trigrams to possibly be within max_edits
+            query_trigrams = trigrams(token)
+            counts = Counter(
+                candidate
+                for trigram in query_trigrams
+                for candidate in self.vocabulary_trigrams.get(trigram, ())
+            )
+            needed = len(query_trigrams) - 3 * max_edits
+            for candidate, shared in counts.items():
+                if candidate == token or shared < needed:
+                    continue
+                distance = edit_distance(token, candidate, max_edits)
+                if distance <= max_edits:
+                    expansion[candidate] = 1 - distance / max(len(token), len(candidate))
+
+        self._expansions[token] = expansion
+        return expansion
+
+    def search(self, query, min_score=0.0):
+        """
+        Scores a name or address against every indexed document.
+
+        The query's tokens are aligned in order with a run of document tokens at most the
+        query's length plus the slack long, and the score is the share of the query's tokens
+        aligned (fuzzy matches count by their similarity) in the best such run. Numbers must
+        all be aligned, exactly and in the query's order, or the document scores 0, so
+        "NO 11" does not match "NO 1" and "NO 7 JALAN 9" does not match "NO 9 JALAN 7".
+        Runs are only tried around the occurrences of the query's rarest number (or, without
+        one, its rarest token), so common tokens like "JLN" or "NO" do not multiply the work.
+
+        Parameters:
+            query (str): The name or address to look for.
+            min_score (float): Leave out documents scoring below this.
+
+        Returns:
+            dict: {doc_id: score between 0 and 1}
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return {}
+
+        hits = defaultdict(lambda: defaultdict(dict))  # doc_id -> {position: {query token: similarity}}
+        for token in set(query_tokens):
+            for candidate, similarity in self.expand(token).items():
+                for doc_id, positions in self.postings[candidate].items():
+                    for position in positions:
+                        matched = hits[doc_id][position]
+                        matched[token] = max(similarity, matched.get(token, 0.0))
+
+        length = len(query_tokens) + self.slack
+        scores = {}
+        for doc_id, similarities in hits.items():
+            aligned = (align_tokens(query_tokens, similarities, start, length)
+                       for start in anchored_starts(query_tokens, similarities, length))
+            score = max((total for total in aligned if total is not None), default=0.0) / len(query_tokens)
+            if score >= min_score and score > 0:
+                scores[doc_id] = score
+        return scores
+
+
+# Function to score how well a name or address appears in one piece of text
+def match_score(text, query):
+    return TokenIndex().add(0, text).search(query).get(0, 0.0)
+
+
+def screen_applicants(statement_text, applicants, threshold=DEFAULT_THRESHOLD):
+    """
+    Matches many applicants against one statement in a single pass over its text.
+
+    Parameters:
+        statement_text (str): Text of the statement.
+        applicants (dict): {applicant_id: {"name": ..., "address": ...}}
+        threshold (float): Score above which a name or address counts as present.
+
+    Returns:
+        dict: {applicant_id: {"name_score", "address_score", "name_present", "address_present"}}
+    """
+    index = TokenIndex().add(0, statement_text)
+
+    results = {}
+    for applicant_id, applicant in applicants.items():
+        name_score = index.search(applicant["name"]).get(0, 0.0)
+        address_score = index.search(applicant["address"]).get(0, 0.0)
+        results[applicant_id] = {
+            "name_score": name_score,
+            "address_score": address_score,
+            "name_present": name_score >= threshold,
+            "address_present": address_score >= threshold,
+        }
+    return results
+
+
+def find_statements(statements, name, address, threshold=DEFAULT_THRESHOLD):
+    """
+    Matches one applicant against many statements at once.
+
+    Parameters:
+        statements (dict | TokenIndex): {statement_id: text}, or a TokenIndex already built over them.
+        name (str): Applicant's full name.
+        address (str): Applicant's address.
+        threshold (float): Score above which a name or address counts as present.
+
+    Returns:
+        dict: {statement_id: {"name_score", "address_score"}} for the statements where both are present.
+    """
+    index = statements
+    if not isinstance(index, TokenIndex):
+        index = TokenIndex()
+        for statement_id, text in statements.items():
+            index.add(statement_id, text)
+
+    name_scores = index.search(name, threshold)
+    address_scores = index.search(address, threshold)
+    return {
+        statement_id: {"name_score": name_scores[statement_id], "address_score": address_scores[statement_id]}
+        for statement_id in name_scores.keys() & address_scores.keys()
+    }
+
+
+# Example usage:
+# print(match_score("... NO. 1 JLN 1 TMN SATU 12345 KEDAH ...", "No 1, Jalan 1, Taman Satu, 12345, Kedah"))
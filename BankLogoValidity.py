@@ -1,80 +1,161 @@
+import cv2
 import fitz  # PyMuPDF
-import os
-import imagehash
-from PIL import Image
 import numpy as np
-import shutil
-
-# Function to extract images from the PDF
-def extract_images(pdf_path, image_folder):
-    doc = fitz.open(pdf_path)
-
-    if not os.path.exists(image_folder):
-        os.makedirs(image_folder)
-
-    image_count = 0
-    for page_num in range(doc.page_count):
-        page = doc.load_page(page_num)
-        image_list = page.get_images(full=True)
-        
-        for img_index, img in enumerate(image_list):
+import os
+from PIL import Image, ImageOps
+import hashlib
+from io import BytesIO
+from DocumentSession import open_session
+from LogoIndex import DEFAULT_LOGO_FOLDER, compute_hashes, load_logo_index
+
+# Smallest and largest embedded image (in pixels per side) that can plausibly be a bank logo
+MIN_LOGO_SIZE = 16
+MAX_LOGO_SIZE = 1500
+
+# Function to yield the embedded images of the PDF as decoded PIL images, without touching the filesystem
+def iter_images(pdf_path, min_size=MIN_LOGO_SIZE, max_size=MAX_LOGO_SIZE):
+    with open_session(pdf_path) as session:
+        seen_digests = set()
+
+        # Each xref is decoded once, no matter how many pages repeat it
+        for page_num, img in session.unique_images(min_size, max_size):
             xref = img[0]  # Image reference
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-
-            # Save the image to the image folder
-            image_filename = f"image{image_count + 1}.png"
-            image_path = os.path.join(image_folder, image_filename)
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_bytes)
-            
-            image_count += 1
-
-    doc.close()
-
-# Function to compare images based on their hash values and return if similarity is above threshold
-def compare_images(location, folder_path, similarity_threshold=90, hash_size=8):
-    threshold = 1 - similarity_threshold / 100
-    diff_limit = int(threshold * (hash_size ** 2))
-
-    # Get the hash of the location image (official logo)
-    with Image.open(location) as img:
-        hash1 = imagehash.average_hash(img, hash_size).hash
-
-    fnames = os.listdir(folder_path)
-
-    for image in fnames:
-        # Skip non-image files
-        if not image.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-            continue
-
-        image_path = os.path.join(folder_path, image)
-
-        with Image.open(image_path) as img:
-            hash2 = imagehash.average_hash(img, hash_size).hash
-
-            # Compare hashes and check if similarity is above the threshold
-            diff = np.count_nonzero(hash1 != hash2)
-            similarity_score = 100 * (1 - diff / (hash_size ** 2))
-
-            if similarity_score >= similarity_threshold:
-                # If similarity is above threshold, return True
-                # print(f"Similarity score: {similarity_score:.2f}% - Match found!")
-                return True  # Found a match with similarity > 90%
-    
-    # If no match found, return False
+            image_bytes = session.extract_image(xref)["image"]
+
+            # Skip identical images stored under different xrefs
+            digest = hashlib.sha1(image_bytes).digest()
+            if digest in seen_digests:
+                continue
+            seen_digests.add(digest)
+
+            try:
+                image = Image.open(BytesIO(image_bytes))
+                image.load()
+            except Exception:
+                continue  # Formats PIL cannot decode (e.g. JBIG2) cannot be logos we know
+
+            yield xref, image
+
+# Function to load the logo index and the bank to match for a logo file (or a folder of logos to accept any bank)
+def load_reference(location, hash_size=8):
+    if os.path.isdir(location):
+        return load_logo_index(location, hash_size=hash_size), None
+
+    bank = os.path.splitext(os.path.basename(location))[0].lower()
+    return load_logo_index(os.path.dirname(location) or ".", hash_size=hash_size), bank
+
+# Function to find the best matching official logo among the images embedded in the PDF
+def identify_bank(pdf_path, logo_folder=DEFAULT_LOGO_FOLDER, similarity_threshold=90, hash_size=8):
+    index = load_logo_index(logo_folder, hash_size=hash_size)
+    best = None
+
+    with open_session(pdf_path) as session:
+        for xref, img in iter_images(session):
+            match = index.query(img, similarity_threshold)
+            if match is not None and (best is None or match["distance"] < best["distance"]):
+                best = dict(match, xref=xref)
+
+        # No embedded image matched: look for a scanned or vector-drawn logo in the page header
+        if best is None:
+            best = locate_logo(session, logo_folder, similarity_threshold, hash_size=hash_size)
+    return best
+
+def locate_logo(pdf_path, logo_folder=DEFAULT_LOGO_FOLDER, similarity_threshold=90, bank=None,
+                header_fraction=0.2, zoom=1.0, merge_gaps=(1, 9, 25), min_size=8, ink_tolerance=40, hash_size=8):
+    """
+    Finds a bank logo that is not an embedded image (scanned statements, vector logos) by
+    rendering only the header band of the first page through a clip rectangle and looking
+    candidate windows up in the logo index.
+
+    The windows are the bounding boxes of the inked regions, grouped at several gap sizes so
+    that a logo's icon and wordmark are also tried together. Fingerprints are computed on
+    margin-trimmed images, so a window only has to contain the logo, not line up with it.
+
+    Parameters:
+        pdf_path (str | DocumentSession): Path to the input PDF file, or a shared document session.
+        logo_folder (str): Folder with the official logos.
+        similarity_threshold (int): Minimum similarity percentage for a match.
+        bank (str): Only accept this bank's logo (default is any bank).
+        header_fraction (float): Fraction of the page height, from the top, to render.
+        zoom (float): Render zoom (1.0 is 72 DPI).
+        merge_gaps (tuple): Gaps in pixels bridged when grouping inked regions into windows.
+        min_size (int): Smallest window side in pixels.
+        ink_tolerance (int): How far from white a pixel must be to count as ink.
+        hash_size (int): Size of each hash.
+
+    Returns:
+        dict | None: {"bank", "filename", "distance", "similarity", "bbox"} of the best match, or None.
+            bbox is (x0, y0, x1, y1) in PDF points on the first page.
+    """
+    index = load_logo_index(logo_folder, hash_size=hash_size)
+
+    with open_session(pdf_path) as session:
+        if session.page_count == 0:
+            return None
+
+        page_rect = session.page(0).rect
+        clip = fitz.Rect(page_rect.x0, page_rect.y0, page_rect.x1, page_rect.y0 + page_rect.height * header_fraction)
+        pix = session.pixmap(0, zoom, clip=clip)
+        mode = "RGB" if pix.n == 3 else "L" if pix.n == 1 else "RGBA"
+        header = Image.frombytes(mode, (pix.width, pix.height), pix.samples).convert("L")
+
+    ink = (np.asarray(header) < 255 - ink_tolerance).astype(np.uint8)
+    ink_ys, ink_xs = np.nonzero(ink)
+    windows = set()
+    for gap in merge_gaps:
+        kernel = np.ones((max(1, gap // 3), gap), np.uint8)
+        mask = cv2.dilate(ink, kernel) if gap > 1 else ink
+        count, labels = cv2.connectedComponents(mask, connectivity=8)
+
+        # The dilated mask only groups the ink; each window spans the ink pixels of its group,
+        # so it is not inflated by the dilation
+        groups = labels[ink_ys, ink_xs]
+        x0 = np.full(count, ink.shape[1]); y0 = np.full(count, ink.shape[0])
+        x1 = np.zeros(count, dtype=np.int64); y1 = np.zeros(count, dtype=np.int64)
+        np.minimum.at(x0, groups, ink_xs); np.minimum.at(y0, groups, ink_ys)
+        np.maximum.at(x1, groups, ink_xs + 1); np.maximum.at(y1, groups, ink_ys + 1)
+        for label in range(1, count):  # Label 0 is the background
+            if x1[label] - x0[label] >= min_size and y1[label] - y0[label] >= min_size:
+                windows.add((int(x0[label]), int(y0[label]), int(x1[label]), int(y1[label])))
+
+    best = None
+    for x0, y0, x1, y1 in windows:
+        # A white border gives trim_margins the background to trim against, as the window ends at the ink
+        window = ImageOps.expand(header.crop((x0, y0, x1, y1)), border=1, fill=255)
+        match = index.best_match(compute_hashes(window, hash_size), similarity_threshold, bank)
+        if match is not None and (best is None or match["distance"] < best["distance"]):
+            best = dict(match, bbox=(clip.x0 + x0 / zoom, clip.y0 + y0 / zoom, clip.x0 + x1 / zoom, clip.y0 + y1 / zoom))
+    return best
+
+# Function to compare the images embedded in the PDF with the official logo, in memory
+# (falls back to rendering the page header when no embedded image matches)
+def compare_pdf_images(pdf_path, location, similarity_threshold=90, hash_size=8, render_fallback=True):
+    index, bank = load_reference(location, hash_size)
+
+    with open_session(pdf_path) as session:
+        for xref, img in iter_images(session):
+            if bank is None:
+                matched = index.query(img, similarity_threshold) is not None
+            else:
+                matched = index.matches_bank(img, bank, similarity_threshold)
+
+            if matched:
+                return True  # Stop at the first embedded image that matches
+
+        if render_fallback:
+            logo_folder = location if bank is None else os.path.dirname(location) or "."
+            return locate_logo(session, logo_folder, similarity_threshold, bank, hash_size=hash_size) is not None
     return False
 
 # Main function to extract and compare images, returning True if a match > 90% is found
-def main(pdf_path, logo_path, output_folder, similarity_threshold=90):
-    # Step 1: Extract images from the PDF
-    extract_images(pdf_path, output_folder)
-
-    # Step 2: Compare the extracted images with the official logo and check for matches
-    return compare_images(logo_path, output_folder, similarity_threshold)
+# (logo_path can be one bank's official logo, or the "Official Logo" folder to accept any bank)
+def main(pdf_path, logo_path, output_folder=None, similarity_threshold=90):
+    # The images are decoded in memory, so output_folder is no longer written to and
+    # leftovers from an earlier applicant can no longer cause a false match
+    return compare_pdf_images(pdf_path, logo_path, similarity_threshold)
 
 
 # Run the main method to check for similarity
-# result = main("FakeBankStatement.pdf", "Official Logo/maybank.png", "Extracted Images", similarity_threshold=90)
+# result = main("FakeBankStatement.pdf", "Official Logo/maybank.png", similarity_threshold=90)
 
 # print(result)
\ No newline at end of file
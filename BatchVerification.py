@@ -0,0 +1,193 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from OCRCache import configure_ocr_cache
+from OCRReaderPool import configure_reader_pool
+from VerificationExecutor import DEFAULT_TIMEOUT, document_checks, run_checks, with_own_sessions
+
+
+# Function to load the applications from a CSV or JSONL manifest
+# (columns/keys: applicant_id, pdf_path, name, address; relative paths are resolved against the manifest)
+def load_manifest(manifest_path):
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        if manifest_path.lower().endswith(".csv"):
+            records = list(csv.DictReader(file))
+        else:
+            records = [json.loads(line) for line in file if line.strip()]
+
+    for record in records:
+        record["pdf_path"] = os.path.join(base_dir, record["pdf_path"])
+        record.setdefault("applicant_id", os.path.splitext(os.path.basename(record["pdf_path"]))[0])
+    return records
+
+
+# Function to load the applications from a directory of PDFs, each with a <name>.json
+# sidecar holding the applicant's "name" and "address" (and optionally "applicant_id")
+def load_directory(directory):
+    records = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.lower().endswith(".pdf"):
+            continue
+
+        stem = os.path.splitext(filename)[0]
+        record = {"applicant_id": stem, "pdf_path": os.path.join(directory, filename)}
+
+        sidecar_path = os.path.join(directory, stem + ".json")
+        if os.path.exists(sidecar_path):
+            with open(sidecar_path, "r", encoding="utf-8") as file:
+                record.update(json.load(file))
+        records.append(record)
+    return records
+
+
+# Function to read the applicant IDs already written to the output, so an interrupted run can resume
+def load_completed(output_path):
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as file:
+        data = file.read()
+
+        # Drop a partially written last line left behind by an interrupted run
+        if data and not data.endswith(b"\n"):
+            data = data[:data.rfind(b"\n") + 1]
+            file.seek(0)
+            file.truncate(len(data))
+
+    completed = set()
+    for line in data.decode("utf-8").splitlines():
+        try:
+            completed.add(json.loads(line)["applicant_id"])
+        except (ValueError, KeyError):
+            continue
+    return completed
+
+
+def verify_application(record, options):
+    """
+    Runs every document check for one application. Executed inside a worker process.
+
+    Parameters:
+        record (dict): The application: applicant_id, pdf_path, name and address.
+        options (dict): logo_path, similarity_threshold, timeout and highlight_dir.
+
+    Returns:
+        dict: One JSONL record with the applicant ID, the PDF path and the verdict.
+    """
+    output = {"applicant_id": record["applicant_id"], "pdf_path": record["pdf_path"]}
+
+    missing = [key for key in ("name", "address") if not record.get(key)]
+    if missing:
+        output["error"] = f"Missing applicant fields: {', '.join(missing)}"
+        return output
+
+    highlighted_pdf_path = os.path.join(options["highlight_dir"], f"{record['applicant_id']}Scanned.pdf")
+
+    try:
+        # Read the statement once; each check gets its own document, closed when the check returns
+        with open(record["pdf_path"], "rb") as file:
+            data = file.read()
+        checks = document_checks(
+            data, record["name"], record["address"],
+            logo_path=options["logo_path"],
+            highlighted_pdf_path=highlighted_pdf_path,
+            similarity_threshold=options["similarity_threshold"],
+            timeout=options["timeout"],
+        )
+        output.update(run_checks(with_own_sessions(checks, ocr=True)))
+    except Exception as e:
+        output["error"] = f"{type(e).__name__}: {e}"
+
+    return output
+
+
+# Function to size each worker's OCR reader pool so that all workers together use every core once,
+# and to point the workers at a shared on-disk OCR cache if one is given
+def init_worker(ocr_readers, torch_threads, ocr_cache_dir=None):
+    configure_reader_pool(size=ocr_readers, torch_threads=torch_threads)
+    if ocr_cache_dir is not None:
+        configure_ocr_cache(disk_dir=ocr_cache_dir)
+
+
+def run_batch(records, output_path, options, workers=None, max_tasks_per_child=None, ocr_readers=1, ocr_cache_dir=None):
+    """
+    Verifies the applications on a process pool, appending one JSON line per application
+    to output_path as soon as it finishes. Applications already in the output are skipped.
+    Each worker gets ocr_readers OCR readers, created only if it OCRs a scanned page; with
+    ocr_cache_dir, OCR results are cached on disk and reused across workers and runs.
+
+    Returns:
+        tuple: (number of applications verified in this run, number skipped as already done)
+    """
+    completed = load_completed(output_path)
+    todo = [record for record in records if record["applicant_id"] not in completed]
+    os.makedirs(options["highlight_dir"], exist_ok=True)
+
+    verified = 0
+    cpu_count = os.cpu_count() or 1
+    torch_threads = max(1, cpu_count // ((workers or cpu_count) * ocr_readers))
+    executor = ProcessPoolExecutor(
+        max_workers=workers, max_tasks_per_child=max_tasks_per_child,
+        initializer=init_worker, initargs=(ocr_readers, torch_threads, ocr_cache_dir),
+    )
+    try:
+        with open(output_path, "a", encoding="utf-8") as out:
+            futures = [executor.submit(verify_application, record, options) for record in todo]
+
+            for future in as_completed(futures):
+                out.write(json.dumps(future.result(), default=str) + "\n")
+                out.flush()  # Make the line durable before the next one, so resume sees it
+                verified += 1
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return verified, len(records) - len(todo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify a backlog of applicant documents without the Streamlit page.")
+    parser.add_argument("input", help="Directory of PDFs with <name>.json sidecars, or a .csv/.jsonl manifest")
+    parser.add_argument("-o", "--output", default="verification_results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--logo", default="Official Logo/maybank.png", help="Path to the official bank logo")
+    parser.add_argument("--similarity-threshold", type=int, default=90, help="Minimum logo similarity percentage")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Per-check timeout in seconds")
+    parser.add_argument("--highlight-dir", default="Highlighted", help="Folder for the PDFs with highlighted annotations")
+    parser.add_argument("--max-tasks-per-child", type=int, default=None, help="Restart each worker after this many applications")
+    parser.add_argument("--ocr-readers", type=int, default=1, help="OCR readers per worker, for scanned statements")
+    parser.add_argument("--ocr-cache-dir", default=None, help="Folder to cache OCR results in, shared by the workers")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.input):
+        records = load_directory(args.input)
+    else:
+        records = load_manifest(args.input)
+
+    options = {
+        "logo_path": args.logo,
+        "similarity_threshold": args.similarity_threshold,
+        "timeout": args.timeout,
+        "highlight_dir": args.highlight_dir,
+    }
+
+    try:
+        verified, skipped = run_batch(records, args.output, options, args.workers, args.max_tasks_per_child, args.ocr_readers, args.ocr_cache_dir)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.", file=sys.stderr)
+        return 130
+
+    print(f"Verified {verified} application(s), skipped {skipped} already in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# Example usage:
+# python BatchVerification.py applications.csv -o results.jsonl -w 8
@@ -0,0 +1,233 @@
+import threading
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+from OCRFallback import OCR_DPI, needs_ocr, ocr_pixmap
+
+
+class DocumentSession:
+    """
+    Holds one opened PDF and memoizes the artifacts the verification checks need,
+    so the same statement is parsed (and rasterized) only once per application.
+
+    Every artifact is computed lazily on first use. Access to the underlying
+    document is serialized with a lock because PyMuPDF documents are not
+    thread-safe; the work done on the returned artifacts can still run in parallel.
+
+    Parameters:
+        source (str | bytes | fitz.Document): Path to the PDF, its raw bytes, or an already opened document.
+        filetype (str): File type hint used when opening raw bytes (default is "pdf").
+        ocr (bool): OCR the pages that have no text layer (scans, photos) and serve their text and
+            words from the OCR result; pages with text are never OCR-ed (default is False).
+    """
+
+    def __init__(self, source, filetype="pdf", ocr=False):
+        self._stream = None
+        if isinstance(source, fitz.Document):
+            self.doc = source
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            self._stream = bytes(source)
+            self.doc = fitz.open(stream=self._stream, filetype=filetype)
+        else:
+            self.doc = fitz.open(source)
+
+        self.name = self.doc.name
+        self.ocr = ocr
+        self.lock = threading.RLock()
+
+        self._pages = {}
+        self._page_text = {}
+        self._words = {}
+        self._images = {}
+        self._extracted = {}
+        self._pixmaps = {}
+        self._scanned = {}
+        self._ocr_results = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.page_count
+
+    @property
+    def page_count(self):
+        return self.doc.page_count
+
+    @property
+    def metadata(self):
+        return self.doc.metadata or {}
+
+    # Function to load a page object (memoized unless cache is False)
+    def page(self, page_num, cache=True):
+        with self.lock:
+            page = self._pages.get(page_num)
+            if page is None:
+                page = self.doc.load_page(page_num)
+                if cache:
+                    self._pages[page_num] = page
+            return page
+
+    # Function to get the plain text of a page (from OCR if the page has no text layer and ocr is on)
+    def page_text(self, page_num, cache=True):
+        with self.lock:
+            text = self._page_text.get(page_num)
+            if text is not None:
+                return text
+            page = self.page(page_num, cache)
+            text = page.get_text("text")
+            scanned = self.is_scanned(page_num, text)
+
+        if scanned:
+            text = self.ocr_page(page_num, cache)[0]  # Outside the lock, so other checks keep going
+        if cache:
+            with self.lock:
+                self._page_text[page_num] = text
+        return text
+
+    # Function to get the text of the whole document, page by page
+    def text(self):
+        return "".join(self.page_text(page_num) for page_num in range(self.page_count))
+
+    # Function to get the word boxes of a page: (x0, y0, x1, y1, word, block_no, line_no, word_no)
+    def words(self, page_num, cache=True):
+        with self.lock:
+            words = self._words.get(page_num)
+            if words is not None:
+                return words
+            page = self.page(page_num, cache)
+            words = page.get_text("words")
+            scanned = self.is_scanned(page_num)
+
+        if scanned:
+            words = self.ocr_page(page_num, cache)[1]
+        if cache:
+            with self.lock:
+                self._words[page_num] = words
+        return words
+
+    # Function to check (and remember) whether a page needs OCR; always False unless ocr is on
+    def is_scanned(self, page_num, text=None):
+        if not self.ocr:
+            return False
+        with self.lock:
+            scanned = self._scanned.get(page_num)
+            if scanned is None:
+                page = self.page(page_num)
+                scanned = needs_ocr(page, page.get_text("text") if text is None else text)
+                self._scanned[page_num] = scanned
+            return scanned
+
+    # Function to OCR a page into (text, words); the result is kept so that page_text and words
+    # share one OCR run (with cache False, only the most recent page's result is kept)
+    def ocr_page(self, page_num, cache=True, dpi=OCR_DPI):
+        with self.lock:
+            result = self._ocr_results.get(page_num)
+            if result is not None:
+                return result
+            pix = self.pixmap(page_num, dpi / 72, cache=False)
+
+        result = ocr_pixmap(pix, dpi / 72)
+        with self.lock:
+            if not cache:
+                self._ocr_results.clear()
+            self._ocr_results[page_num] = result
+        return result
+
+    # Function to list the embedded images of a page, as returned by page.get_images(full=True)
+    def image_xrefs(self, page_num):
+        with self.lock:
+            images = self._images.get(page_num)
+            if images is None:
+                images = self.page(page_num).get_images(full=True)
+                self._images[page_num] = images
+            return images
+
+    # Function to list each embedded image of the document once, as (page_num, image) pairs,
+    # skipping repeated xrefs (e.g. a logo drawn on every page) and images outside the size bounds
+    def unique_images(self, min_size=0, max_size=None):
+        seen = set()
+        for page_num in range(self.page_count):
+            for img in self.image_xrefs(page_num):
+                xref, width, height = img[0], img[2], img[3]
+                if xref in seen:
+                    continue
+                seen.add(xref)
+
+                if min(width, height) < min_size or (max_size is not None and max(width, height) > max_size):
+                    continue
+                yield page_num, img
+
+    # Function to extract (and memoize) the raw data of an embedded image
+    def extract_image(self, xref):
+        with self.lock:
+            base_image = self._extracted.get(xref)
+            if base_image is None:
+                base_image = self.doc.extract_image(xref)
+                self._extracted[xref] = base_image
+            return base_image
+
+    # Function to render a page (or a clipped region of it) at a given zoom
+    def pixmap(self, page_num, zoom_x=2.0, zoom_y=None, clip=None, cache=True):
+        if zoom_y is None:
+            zoom_y = zoom_x
+        clip_key = tuple(fitz.Rect(clip)) if clip is not None else None
+        key = (page_num, zoom_x, zoom_y, clip_key)
+
+        with self.lock:
+            pix = self._pixmaps.get(key)
+            if pix is None:
+                mat = fitz.Matrix(zoom_x, zoom_y)
+                pix = self.page(page_num, cache).get_pixmap(matrix=mat, clip=clip)
+                if cache:
+                    self._pixmaps[key] = pix
+            return pix
+
+    # Function to open an independent copy of the document, e.g. for checks that modify pages
+    def writable_copy(self):
+        with self.lock:
+            if self._stream is not None:
+                return fitz.open(stream=self._stream, filetype="pdf")
+            if self.name:
+                return fitz.open(self.name)
+            return fitz.open(stream=self.doc.tobytes(), filetype="pdf")
+
+    # Function to drop the memoized artifacts (the document itself stays open)
+    def clear(self):
+        with self.lock:
+            self._pages.clear()
+            self._page_text.clear()
+            self._words.clear()
+            self._images.clear()
+            self._extracted.clear()
+            self._pixmaps.clear()
+            self._scanned.clear()
+            self._ocr_results.clear()
+
+    def close(self):
+        with self.lock:
+            self.clear()
+            if not self.doc.is_closed:
+                self.doc.close()
+
+
+@contextmanager
+def open_session(source, **options):
+    """
+    Yields a DocumentSession for the given source. A session passed in is shared
+    as-is and left open; a path or bytes gets a private session, opened with the
+    given options (e.g. ocr=True), that is closed on exit.
+    """
+    if isinstance(source, DocumentSession):
+        yield source
+        return
+
+    session = DocumentSession(source, **options)
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,161 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Largest number of character crops run in one forward pass
+DEFAULT_MAX_BATCH_SIZE = 256
+
+# Longest time, in milliseconds, the first request of a batch waits for others to join it
+DEFAULT_MAX_LATENCY_MS = 5.0
+
+
+class InferenceBatcher:
+    """
+    In-process inference queue that merges character crops from concurrent requests into
+    one forward pass, so simultaneous Streamlit sessions share a batch instead of each
+    running its own small predict call.
+
+    A background thread takes the first waiting request, then keeps collecting requests
+    until the batch holds max_batch_size crops or max_latency_ms has passed since that
+    first request arrived. The window is only waited out while requests are arriving
+    close together; a lone request runs straight away, so a single user sees no added latency.
+
+    Parameters:
+        predict (callable): Function from a (N, 28, 28, 1) float32 batch to (N, 26) probabilities.
+        max_batch_size (int): Largest number of crops per forward pass (a bigger request runs on its own).
+        max_latency_ms (float): Latency budget for gathering a batch.
+    """
+
+    def __init__(self, predict, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_latency_ms=DEFAULT_MAX_LATENCY_MS):
+        self.predict_batch = predict
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self.counters = {"requests": 0, "batches": 0, "crops": 0}
+
+        self._requests = queue.Queue()
+        self._last_arrival = float("-inf")
+        self._carried = None  # Request that did not fit in the previous batch, first in the next one
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="handwriting-batcher", daemon=True)
+        self._worker.start()
+
+    # Function to queue a batch of crops, returning a Future of its (N, 26) probabilities
+    def submit(self, batch):
+        future = Future()
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) == 0:
+            future.set_result(np.zeros((0, 26), dtype=np.float32))
+            return future
+
+        with self._lock:
+            self.counters["requests"] += 1
+        self._requests.put((batch, future, time.monotonic()))
+        return future
+
+    def predict(self, batch, timeout=None):
+        """
+        Classifies a batch of crops, sharing the forward pass with any concurrent callers.
+
+        Parameters:
+            batch (numpy.ndarray): (N, 28, 28, 1) float32 crops scaled to [0, 1].
+            timeout (float): Seconds to wait for the result (default is no limit).
+
+        Returns:
+            numpy.ndarray: (N, 26) class probabilities, in the order of the input crops.
+        """
+        return self.submit(batch).result(timeout)
+
+    # Function to collect the requests that make up the next batch
+    def _gather(self):
+        first, self._carried = self._carried or self._requests.get(), None
+        requests, size = [first], len(first[0])
+        window = self.max_latency_ms / 1000
+        deadline = first[2] + window
+
+        # Only wait for more requests while traffic is concurrent (the previous request arrived
+        # within one window of this one); otherwise take just what is already queued
+        concurrent = first[2] - self._last_arrival < window
+        self._last_arrival = first[2]
+
+        while size < self.max_batch_size:
+            try:
+                if concurrent:
+                    request = self._requests.get(timeout=max(deadline - time.monotonic(), 0))
+                else:
+                    request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            self._last_arrival = request[2]
+
+            if size + len(request[0]) > self.max_batch_size:
+                self._carried = request
+                break
+            requests.append(request)
+            size += len(request[0])
+
+        return requests
+
+    def _run(self):
+        while True:
+            requests = self._gather()
+            try:
+                probabilities = self.predict_batch(np.concatenate([batch for batch, _, _ in requests]))
+            except Exception as error:
+                for _, future, _ in requests:
+                    future.set_exception(error)
+            else:
+                # Split the batch's output back into each caller's rows
+                start = 0
+                for batch, future, _ in requests:
+                    future.set_result(probabilities[start:start + len(batch)])
+                    start += len(batch)
+
+            with self._lock:
+                self.counters["batches"] += 1
+                self.counters["crops"] += sum(len(batch) for batch, _, _ in requests)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["average_batch"] = stats["crops"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+# The process-wide batcher, and the process it was created in (a forked worker needs its own thread)
+_batcher = None
+_batcher_pid = None
+_batcher_options = {}
+_batcher_lock = threading.Lock()
+
+
+def configure_batcher(**options):
+    """
+    Sets the batch size and latency budget of the process-wide batcher.
+    Call it before the first prediction; requests already queued finish on the previous batcher.
+
+    Parameters:
+        **options: InferenceBatcher options (max_batch_size, max_latency_ms).
+    """
+    global _batcher, _batcher_options
+    with _batcher_lock:
+        _batcher_options = dict(options)
+        _batcher = None
+
+
+# Function to get the process-wide batcher, started on first use around the given predict function
+def get_batcher(predict):
+    global _batcher, _batcher_pid
+    with _batcher_lock:
+        if _batcher is None or _batcher_pid != os.getpid():
+            _batcher = InferenceBatcher(predict, **_batcher_options)
+            _batcher_pid = os.getpid()
+        return _batcher
+
+
+# Example usage:
+# configure_batcher(max_batch_size=512, max_latency_ms=10)
+# probabilities = get_batcher(model.predict).predict(batch)
@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+
+DATASET_PATH = "A_Z Handwritten Data.csv"
+
+# Rows parsed per chunk while converting the CSV, so the conversion never holds the whole dataset in memory
+CONVERT_CHUNK_ROWS = 20000
+
+# Default held-out shares, as in the original training script (1% test, then 10% of the rest for validation)
+TEST_FRACTION = 0.01
+VALIDATION_FRACTION = 0.1
+
+
+# Function to get the paths of the converted image and label files next to the CSV
+def converted_paths(csv_path=DATASET_PATH):
+    stem = os.path.splitext(csv_path)[0]
+    return f"{stem}.images.npy", f"{stem}.labels.npy"
+
+
+def convert_csv(csv_path=DATASET_PATH, chunk_rows=CONVERT_CHUNK_ROWS):
+    """
+    Converts the Kaggle A-Z CSV (label followed by 784 pixel values per row) into two .npy files
+    that can be memory-mapped: an (N, 28, 28) uint8 image array and an (N,) uint8 label index.
+    The CSV is parsed in chunks and written straight into the memory-mapped output.
+
+    Parameters:
+        csv_path (str): Path to the dataset CSV.
+        chunk_rows (int): Rows parsed per chunk.
+
+    Returns:
+        tuple: (images path, labels path)
+    """
+    import pandas as pd
+
+    images_path, labels_path = converted_paths(csv_path)
+
+    # The first line is read as a header by pandas, as in the original training script
+    count, last = 0, b"\n"
+    with open(csv_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 24), b""):
+            count, last = count + chunk.count(b"\n"), chunk[-1:]
+    count += (last != b"\n") - 1
+
+    # Write to temporary files first, so an interrupted conversion is never mistaken for a finished one
+    temp_images, temp_labels = f"{images_path}.tmp", f"{labels_path}.tmp"
+    images = np.lib.format.open_memmap(temp_images, mode="w+", dtype=np.uint8, shape=(count, 28, 28))
+    labels = np.lib.format.open_memmap(temp_labels, mode="w+", dtype=np.uint8, shape=(count,))
+
+    start = 0
+    for chunk in pd.read_csv(csv_path, dtype=np.uint8, chunksize=chunk_rows):
+        rows = chunk.to_numpy()
+        images[start:start + len(rows)] = rows[:, 1:].reshape(-1, 28, 28)
+        labels[start:start + len(rows)] = rows[:, 0]
+        start += len(rows)
+
+    if start != count:
+        raise ValueError(f"Expected {count} rows in {csv_path}, read {start}")
+    images.flush(); labels.flush()
+    del images, labels
+
+    os.replace(temp_images, images_path)
+    os.replace(temp_labels, labels_path)
+    return images_path, labels_path
+
+
+def load_dataset(csv_path=DATASET_PATH):
+    """
+    Opens the converted dataset as read-only memory maps, converting the CSV first if it has not
+    been converted yet (or has changed since). Only the pages that are actually read are loaded.
+
+    Parameters:
+        csv_path (str): Path to the dataset CSV.
+
+    Returns:
+        tuple: ((N, 28, 28) uint8 images, (N,) uint8 labels)
+    """
+    images_path, labels_path = converted_paths(csv_path)
+    converted = os.path.exists(images_path) and os.path.exists(labels_path)
+    if not converted or (os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(images_path)):
+        convert_csv(csv_path)
+    return np.load(images_path, mmap_mode="r"), np.load(labels_path, mmap_mode="r")
+
+
+# Function to split row indices into shuffled train, validation and test sets
+def split_indices(count, test_fraction=TEST_FRACTION, validation_fraction=VALIDATION_FRACTION, seed=0):
+    indices = np.random.default_rng(seed).permutation(count)
+    test_count = int(round(count * test_fraction))
+    validation_count = int(round((count - test_count) * validation_fraction))
+    test, validation = indices[:test_count], indices[test_count:test_count + validation_count]
+    return indices[test_count + validation_count:], validation, test
+
+
+def make_dataset(images, labels, indices, batch_size=256, shuffle=True, seed=0):
+    """
+    Builds a tf.data pipeline over the memory-mapped dataset. Only the row indices are shuffled;
+    each batch gathers its rows from the memory map and is normalized to [0, 1] on the fly,
+    while the next batches are prefetched.
+
+    Parameters:
+        images (numpy.ndarray): (N, 28, 28) uint8 images (a memory map from load_dataset).
+        labels (numpy.ndarray): (N,) uint8 labels.
+        indices (numpy.ndarray): Rows to use (e.g. one of the sets from split_indices).
+        batch_size (int): Images per batch.
+        shuffle (bool): Reshuffle the rows every epoch (default is True; use False for evaluation).
+        seed (int): Shuffle seed.
+
+    Returns:
+        tf.data.Dataset: Batches of ((batch, 28, 28, 1) float32 images, (batch,) int32 labels).
+    """
+    import tensorflow as tf
+
+    # Function to read one batch of rows; sorted indices keep the reads in file order
+    def gather(batch_indices):
+        rows = np.sort(batch_indices)
+        return images[rows], labels[rows]
+
+    def read_batch(batch_indices):
+        batch_images, batch_labels = tf.numpy_function(gather, [batch_indices], [tf.uint8, tf.uint8])
+        batch_images = tf.reshape(tf.cast(batch_images, tf.float32) / 255., (-1, 28, 28, 1))
+        return batch_images, tf.reshape(tf.cast(batch_labels, tf.int32), (-1,))
+
+    dataset = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+    if shuffle:
+        dataset = dataset.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+    return (dataset.batch(batch_size)
+            .map(read_batch, num_parallel_calls=tf.data.AUTOTUNE)
+            .prefetch(tf.data.AUTOTUNE))
+
+
+# Example usage:
+# images, labels = load_dataset()
+# train, validation, test = split_indices(len(images))
+# model.fit(make_dataset(images, labels, train), validation_data=make_dataset(images, labels, validation, shuffle=False))
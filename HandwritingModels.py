@@ -0,0 +1,188 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from HandwritingDataset import DATASET_PATH, load_dataset, split_indices
+
+alphabets = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+COMPACT_MODEL_PATH = "handwritten_alphabet_model_compact.h5"
+
+# Crops per call when measuring latency: one character, and a typical handwritten name
+LATENCY_BATCH_SIZES = (1, 16)
+
+
+def build_model(variant="standard"):
+    """
+    Builds the (uncompiled) alphabet classifier.
+
+    Parameters:
+        variant (str): "standard" (the original network: 128 and 64 filter convolutions at full
+            28x28 resolution) or "compact" (a small first convolution, then pooling before depthwise
+            separable convolutions; a small fraction of the standard network's multiply-adds, for CPU serving).
+
+    Returns:
+        keras.Model: The model, taking (N, 28, 28, 1) float32 crops and returning (N, 26) probabilities.
+    """
+    from keras.models import Sequential
+    from keras.layers import BatchNormalization, Conv2D, Dense, Dropout, Flatten, MaxPooling2D, SeparableConv2D
+
+    if variant == "standard":
+        return Sequential([Conv2D(128,(3,3),activation='relu', kernel_initializer='he_uniform', input_shape=(28, 28, 1),padding='same'),
+                           Conv2D(64,(3,3),activation='relu', kernel_initializer='he_uniform',padding='same'),
+                           MaxPooling2D(2,2),
+                           Conv2D(64,(3,3),activation='relu', kernel_initializer='he_uniform',padding='same'),
+                           Conv2D(64,(3,3),activation='relu', kernel_initializer='he_uniform',padding='same'),
+                           BatchNormalization(),
+                           MaxPooling2D(2,2),
+                           Flatten(),
+                           Dense(100,activation='relu',kernel_initializer='he_uniform'),
+                           Dropout(0.1),
+                           Dense(64,activation='relu',kernel_initializer='he_uniform'),
+                           Dropout(0.125),
+                           BatchNormalization(),
+                           Dense(26,activation='softmax')])
+
+    if variant == "compact":
+        # Only the first convolution runs at full resolution, with few filters; the rest run on
+        # pooled maps as separable convolutions (a 3x3 per-channel filter, then a 1x1 mix)
+        return Sequential([Conv2D(32,(3,3),activation='relu', kernel_initializer='he_uniform', input_shape=(28, 28, 1),padding='same'),
+                           MaxPooling2D(2,2),
+                           SeparableConv2D(64,(3,3),activation='relu',padding='same'),
+                           MaxPooling2D(2,2),
+                           SeparableConv2D(64,(3,3),activation='relu',padding='same'),
+                           BatchNormalization(),
+                           MaxPooling2D(2,2),
+                           Flatten(),
+                           Dense(64,activation='relu',kernel_initializer='he_uniform'),
+                           Dropout(0.1),
+                           Dense(26,activation='softmax')])
+
+    raise ValueError(f"Unknown model variant {variant!r}; expected 'standard' or 'compact'")
+
+
+def evaluate_model(predict, images, labels, batch_size=1024):
+    """
+    Evaluates a classifier over a whole test split in batches.
+
+    Parameters:
+        predict (callable): Function from a (N, 28, 28, 1) float32 batch to (N, 26) probabilities
+            (e.g. a Keras model's predict_on_batch, or TFLiteClassifier.predict).
+        images (numpy.ndarray): (N, 28, 28) uint8 images.
+        labels (numpy.ndarray): (N,) class indices.
+        batch_size (int): Images per forward pass.
+
+    Returns:
+        dict: {"accuracy", "confusion" (26x26 counts, rows are true letters), "samples_per_second", "predictions"}
+    """
+    predictions, elapsed = [], 0.0
+    for start in range(0, len(images), batch_size):
+        batch = np.asarray(images[start:start + batch_size]).reshape(-1, 28, 28, 1).astype(np.float32) / 255.
+        # Only the forward pass is timed, not the reading and normalizing of the batch
+        began = time.perf_counter()
+        probabilities = np.asarray(predict(batch))
+        elapsed += time.perf_counter() - began
+        predictions.append(probabilities.argmax(axis=1))
+
+    predictions = np.concatenate(predictions) if predictions else np.zeros(0, dtype=np.int64)
+    labels = np.asarray(labels, dtype=np.int64)
+    confusion = np.bincount(labels * 26 + predictions, minlength=26 * 26).reshape(26, 26)
+    return {
+        "accuracy": float(np.mean(predictions == labels)) if len(labels) else 0.0,
+        "confusion": confusion,
+        "samples_per_second": len(labels) / elapsed if elapsed else 0.0,
+        "predictions": predictions,
+    }
+
+
+# Function to name the device Keras runs a model's forward pass on: the GPU whenever TensorFlow sees one
+def keras_device():
+    import tensorflow as tf
+
+    return "GPU" if tf.config.list_physical_devices("GPU") else "CPU"
+
+
+# Function to measure the median time of one predict call for each of the given batch sizes, in milliseconds
+def measure_latency(predict, batch_sizes=LATENCY_BATCH_SIZES, repeats=100):
+    latencies = {}
+    for batch_size in batch_sizes:
+        batch = np.random.default_rng(0).random((batch_size, 28, 28, 1), dtype=np.float32)
+        predict(batch)  # Warm-up (graph tracing, tensor allocation)
+        timings = []
+        for _ in range(repeats):
+            began = time.perf_counter()
+            predict(batch)
+            timings.append(time.perf_counter() - began)
+        latencies[batch_size] = float(np.median(timings) * 1000)
+    return latencies
+
+
+# Function to print an evaluation (and optional latency, labelled with the device it was measured on)
+# report, with the most frequent confusions
+def print_report(result, latencies=None, device="CPU", top_confusions=10):
+    print(f"Accuracy {result['accuracy']:.4f} over {int(result['confusion'].sum())} images, "
+          f"{result['samples_per_second']:.0f} samples/sec")
+    for batch_size, milliseconds in (latencies or {}).items():
+        print(f"{device} latency for {batch_size} crop(s): {milliseconds:.2f} ms")
+
+    confusion = result["confusion"]
+    totals = confusion.sum(axis=1)
+    per_letter = np.divide(np.diag(confusion), totals, out=np.zeros(26), where=totals > 0)
+    print("Per-letter accuracy: " + " ".join(f"{letter}:{accuracy:.2f}" for letter, accuracy in zip(alphabets, per_letter)))
+
+    errors = confusion.copy()
+    np.fill_diagonal(errors, 0)
+    print("Most frequent confusions (true -> predicted):")
+    for index in np.argsort(errors, axis=None)[::-1][:top_confusions]:
+        actual, predicted = divmod(int(index), 26)
+        if errors[actual, predicted] == 0:
+            break
+        print(f"  {alphabets[actual]} -> {alphabets[predicted]}: {errors[actual, predicted]}")
+
+
+# Function to load a Keras (.h5) or TFLite (.tflite) model as a batch predict function
+def load_predict(model_path):
+    if model_path.endswith(".tflite"):
+        from HandwritingTFLite import TFLiteClassifier
+
+        return TFLiteClassifier(model_path).predict
+
+    from keras.models import load_model
+
+    return load_model(model_path).predict_on_batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate handwritten alphabet models on the held-out test split.")
+    parser.add_argument("models", nargs="+", help="Keras (.h5) or TFLite (.tflite) models to compare")
+    parser.add_argument("--data", default=DATASET_PATH, help="Dataset CSV (converted to memory-mapped arrays on first use)")
+    parser.add_argument("--batch-size", type=int, default=1024, help="Images per forward pass")
+    parser.add_argument("--cpu", action="store_true", help="Hide GPUs, so the latency is CPU inference time")
+    args = parser.parse_args(argv)
+
+    if args.cpu:
+        os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+
+    # The same split as the training script, so no test image was seen in training
+    images, labels = load_dataset(args.data)
+    _, _, test_index = split_indices(len(images))
+    test_index = np.sort(test_index)
+    test_images, test_labels = images[test_index], labels[test_index]
+
+    for model_path in args.models:
+        print(f"== {model_path} ({os.path.getsize(model_path) / 1024:.0f} KiB)")
+        predict = load_predict(model_path)
+        # The TFLite interpreter always runs on the CPU
+        device = "CPU" if model_path.endswith(".tflite") else keras_device()
+        print_report(evaluate_model(predict, test_images, test_labels, args.batch_size), measure_latency(predict), device)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# Example usage:
+# python HandwritingModels.py handwritten_alphabet_model.h5 handwritten_alphabet_model_compact.h5 --cpu
@@ -0,0 +1,250 @@
+import cv2
+import numpy as np
+
+# Noise filters, relative to the median character: components smaller than MIN_AREA_RATIO of the
+# median area (specks, dust) and strokes longer than MAX_ASPECT times their thickness (underlines,
+# form borders) are dropped
+MIN_AREA = 8
+MIN_AREA_RATIO = 0.1
+MAX_ASPECT = 8.0
+
+# A small, roughly square component just above a character (the dot of an i or j) is kept, however
+# small, if the gap between them is at most DOT_GAP times the median character height
+DOT_GAP = 0.5
+
+# Gaps between characters are split into letter gaps and word gaps where the two groups are best
+# separated (Otsu's criterion), if the wider group is on average at least SPLIT_RATIO times the
+# narrower one; a word gap must also be at least WORD_GAP times the median character height, so a
+# single word is not split at its widest letter gap
+SPLIT_RATIO = 2.0
+WORD_GAP = 0.35
+
+# Characters are resized to CHAR_SIZE and padded to the model's 28x28 input, as in training
+CHAR_SIZE = 18
+PADDING = 5
+
+# OpenCV's remap needs every side of its maps and source below SHRT_MAX (32767), so characters are
+# sampled at most REMAP_CHUNK at a time, from the part of the image their boxes cover
+REMAP_CHUNK = 1800
+REMAP_LIMIT = 32000
+
+
+def find_components(thresh, min_area=MIN_AREA, min_area_ratio=MIN_AREA_RATIO, max_aspect=MAX_ASPECT):
+    """
+    Labels the connected ink regions of a binary image and drops the ones that are noise.
+
+    Returns:
+        tuple: (labels image, boxes (N, 4) as x, y, w, h, component label of each box)
+    """
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
+    stats = stats[1:]  # Label 0 is the background
+    ids = np.arange(1, count)
+    if len(stats) == 0:
+        return labels, np.zeros((0, 4), dtype=np.int32), ids
+
+    area = stats[:, cv2.CC_STAT_AREA]
+    width, height = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+    aspect = np.maximum(width, height) / np.maximum(np.minimum(width, height), 1)
+
+    keep = (area >= max(min_area, min_area_ratio * np.median(area))) & (aspect <= max_aspect)
+    # Thin letters (I, l, 1) are tall and narrow, so only flat, wide strokes count as lines
+    keep |= (area >= min_area) & (height > width) & (aspect <= 3 * max_aspect)
+
+    # Dots of i and j are too small for the area filter: keep a small, roughly square component
+    # when a kept character starts just below it, under it
+    if keep.any():
+        x, y = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+        kept = np.flatnonzero(keep)
+        median_height = float(np.median(height[kept]))
+        for dot in np.flatnonzero(~keep & (area >= 2) & (aspect <= 2)):
+            under = ((x[kept] < x[dot] + width[dot]) & (x[kept] + width[kept] > x[dot])
+                     & (y[kept] >= y[dot] + height[dot]) & (y[kept] - y[dot] - height[dot] <= DOT_GAP * median_height))
+            keep[dot] = under.any()
+
+    return labels, stats[keep, :4].astype(np.int32), ids[keep]
+
+
+# Function to merge boxes that overlap horizontally for most of the narrower one (e.g. a letter
+# broken into two strokes, or the dot of an i or j), returning the merged boxes and the box index
+# each input went into
+def merge_broken_characters(boxes, overlap=0.5):
+    merged, owner = [], np.empty(len(boxes), dtype=np.int32)
+    active = []  # Merged boxes still reaching past the current left edge (sweeping left to right)
+
+    for index in np.argsort(boxes[:, 0], kind="stable"):
+        x, y, w, h = (int(value) for value in boxes[index])
+        active = [m for m in active if merged[m][0] + merged[m][2] > x]
+
+        for m in active:
+            mx, my, mw, mh = merged[m]
+            shared = min(x + w, mx + mw) - max(x, mx)
+            vertical_gap = max(y, my) - min(y + h, my + mh)
+            if shared > overlap * min(w, mw) and vertical_gap < max(h, mh):
+                x0, y0 = min(x, mx), min(y, my)
+                merged[m] = [x0, y0, max(x + w, mx + mw) - x0, max(y + h, my + mh) - y0]
+                owner[index] = m
+                break
+        else:
+            merged.append([x, y, w, h])
+            owner[index] = len(merged) - 1
+            active.append(owner[index])
+
+    return np.array(merged, dtype=np.int32).reshape(-1, 4), owner
+
+
+# Function to find the gap that best separates letter gaps from word gaps: the split of the sorted
+# gaps with the largest between-group variance (Otsu's criterion), or 0 when the gaps do not fall
+# into two clearly different groups (a single word, or only single-letter words)
+def split_gaps(gaps, split_ratio=SPLIT_RATIO):
+    gaps = np.sort(np.asarray(gaps, dtype=np.float64))
+    if len(gaps) < 2:
+        return 0.0
+
+    count = np.arange(1, len(gaps))
+    below_mean = np.cumsum(gaps)[:-1] / count
+    above_mean = (gaps.sum() - np.cumsum(gaps)[:-1]) / (len(gaps) - count)
+    variance = count * (len(gaps) - count) * (above_mean - below_mean) ** 2
+    split = int(np.argmax(variance))
+    if above_mean[split] < split_ratio * max(below_mean[split], 1.0):
+        return 0.0
+    return float(gaps[split] + gaps[split + 1]) / 2
+
+
+# Function to assign line and word numbers to character boxes and sort them into reading order
+def reading_order(boxes, word_gap=WORD_GAP):
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    heights = boxes[:, 3]
+    median_height = max(float(np.median(heights)), 1.0)
+    centers = boxes[:, 1] + heights / 2
+
+    # A new line starts wherever the vertical gap between consecutive character centers exceeds half a character
+    by_center = np.argsort(centers, kind="stable")
+    line_of = np.empty(len(boxes), dtype=np.int64)
+    line_of[by_center] = np.concatenate(([0], np.cumsum(np.diff(centers[by_center]) > 0.5 * median_height)))
+
+    # Within a line, left to right; a gap in the wider group of gaps starts a new word
+    order = np.lexsort((boxes[:, 0], line_of))
+    lines = line_of[order]
+    left, right = boxes[order, 0], boxes[order, 0] + boxes[order, 2]
+    gaps = left[1:] - right[:-1]
+    same_line = lines[1:] == lines[:-1]
+    threshold = max(split_gaps(gaps[same_line]), word_gap * median_height)
+    new_word = np.concatenate(([True], ~same_line | (gaps > threshold)))
+
+    words = np.cumsum(new_word) - 1
+    # Number words from 0 within each line
+    line_starts = np.concatenate(([0], np.flatnonzero(lines[1:] != lines[:-1]) + 1))
+    words -= np.repeat(words[line_starts], np.diff(np.concatenate((line_starts, [len(lines)]))))
+    return order, lines, words
+
+
+# Function to split the boxes into runs for remap: at most REMAP_CHUNK characters whose bounding rect
+# (with a pixel of margin for interpolation) stays below REMAP_LIMIT on each side
+def remap_chunks(boxes):
+    chunks, start = [], 0
+    while start < len(boxes):
+        stop = start + 1
+        left, top = boxes[start, 0], boxes[start, 1]
+        right, bottom = left + boxes[start, 2], top + boxes[start, 3]
+        while stop < len(boxes) and stop - start < REMAP_CHUNK:
+            x, y, w, h = boxes[stop]
+            if max(right, x + w) - min(left, x) + 2 >= REMAP_LIMIT or max(bottom, y + h) - min(top, y) + 2 >= REMAP_LIMIT:
+                break
+            left, top, right, bottom = min(left, x), min(top, y), max(right, x + w), max(bottom, y + h)
+            stop += 1
+        chunks.append((start, stop, left, top, right, bottom))
+        start = stop
+    return chunks
+
+
+# Function to cut, resize and pad every character in a few vectorized passes: each remap samples the
+# CHAR_SIZE x CHAR_SIZE grids of a chunk of characters, and the label image masks out strokes of
+# neighbouring characters
+def extract_crops(thresh, labels, boxes, owner_of_label):
+    count = len(boxes)
+    crops = np.zeros((count, CHAR_SIZE + 2 * PADDING, CHAR_SIZE + 2 * PADDING), dtype=np.uint8)
+    if count == 0:
+        return crops
+
+    steps = (np.arange(CHAR_SIZE, dtype=np.float32) + 0.5) / CHAR_SIZE
+    height, width = thresh.shape
+    ink, owners = [], []
+    for start, stop, left, top, right, bottom in remap_chunks(boxes):
+        # Sample from the chunk's part of the image, with a pixel of margin for the interpolation
+        left, top = max(left - 1, 0), max(top - 1, 0)
+        right, bottom = min(right + 1, width), min(bottom + 1, height)
+        size = stop - start
+        local = boxes[start:stop] - np.array([left, top, 0, 0])
+        x, y, w, h = (local[:, i:i + 1].astype(np.float32) for i in range(4))
+        map_x = np.repeat((x + steps * w - 0.5)[:, None, :], CHAR_SIZE, axis=1).reshape(size * CHAR_SIZE, CHAR_SIZE)
+        map_y = np.repeat((y + steps * h - 0.5)[:, :, None], CHAR_SIZE, axis=2).reshape(size * CHAR_SIZE, CHAR_SIZE)
+
+        ink.append(cv2.remap(thresh[top:bottom, left:right], map_x, map_y, cv2.INTER_LINEAR,
+                             borderMode=cv2.BORDER_CONSTANT, borderValue=0))
+        owners.append(cv2.remap(labels[top:bottom, left:right].astype(np.float32), map_x, map_y, cv2.INTER_NEAREST))
+
+    ink = np.concatenate(ink)
+    owners = owner_of_label[np.concatenate(owners).astype(np.int32)]
+    mine = owners.reshape(count, CHAR_SIZE, CHAR_SIZE) == np.arange(count)[:, None, None]
+
+    # Pixels next to a character's own stroke are kept too, so its anti-aliased edges survive
+    mine = cv2.dilate(mine.reshape(count * CHAR_SIZE, CHAR_SIZE).astype(np.uint8), np.ones((3, 3), np.uint8)).reshape(count, CHAR_SIZE, CHAR_SIZE)
+    crops[:, PADDING:PADDING + CHAR_SIZE, PADDING:PADDING + CHAR_SIZE] = ink.reshape(count, CHAR_SIZE, CHAR_SIZE) * mine
+    return crops
+
+
+def segment_handwriting(image, threshold=127, word_gap=WORD_GAP, min_area=MIN_AREA, max_aspect=MAX_ASPECT):
+    """
+    Splits a handwritten image (a word, or a whole form) into characters in reading order.
+
+    Parameters:
+        image (numpy.ndarray): BGR or grayscale image, dark ink on a light background.
+        threshold (int): Gray level below which a pixel counts as ink.
+        word_gap (float): Smallest gap, in character heights, that can separate two words (see split_gaps).
+        min_area (int): Smallest component, in pixels, that can be a character.
+        max_aspect (float): Longest-to-shortest side ratio above which a component is a line, not a character.
+
+    Returns:
+        dict: {"crops": (N, 28, 28) uint8 array, "boxes": (N, 4) x, y, w, h,
+               "lines": (N,) line number, "words": (N,) word number within the line}
+    """
+    grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    _, thresh = cv2.threshold(grey, threshold, 255, cv2.THRESH_BINARY_INV)
+
+    labels, component_boxes, component_ids = find_components(thresh, min_area, max_aspect=max_aspect)
+    boxes, owner = merge_broken_characters(component_boxes)
+    order, lines, words = reading_order(boxes, word_gap)
+
+    # Map every label to the reading-order index of the character it belongs to (-1 for background and noise)
+    position = np.empty(len(boxes), dtype=np.int32)
+    position[order] = np.arange(len(boxes))
+    owner_of_label = np.full(labels.max() + 1, -1, dtype=np.int32)
+    owner_of_label[component_ids] = position[owner]
+
+    boxes = boxes[order]
+    return {
+        "crops": extract_crops(thresh, labels, boxes, owner_of_label),
+        "boxes": boxes,
+        "lines": lines,
+        "words": words,
+    }
+
+
+# Function to join per-character letters into text: spaces between words, newlines between lines
+def assemble_text(letters, lines, words):
+    text = []
+    for i, letter in enumerate(letters):
+        if i > 0:
+            if lines[i] != lines[i - 1]:
+                text.append("\n")
+            elif words[i] != words[i - 1]:
+                text.append(" ")
+        text.append(letter)
+    return "".join(text)
+
+
+# Example usage:
+# segments = segment_handwriting(cv2.imread("Text Recognition Sample.jpg"))
+# print(len(segments["crops"]), segments["lines"], segments["words"])
@@ -0,0 +1,197 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from HandwritingDataset import DATASET_PATH, load_dataset, split_indices
+
+# The interpreter comes from the small tflite-runtime / LiteRT packages when installed, so
+# inference workers do not need TensorFlow at all; TensorFlow's own interpreter is the fallback
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        Interpreter = None
+
+KERAS_MODEL_PATH = "handwritten_alphabet_model.h5"
+TFLITE_MODEL_PATH = "handwritten_alphabet_model.tflite"
+
+# Largest accuracy drop (as a fraction) the quantized model may show against the Keras model
+MAX_ACCURACY_DROP = 0.01
+
+# Quantization used by default: int8 is the smallest model, since worker memory and cold start
+# matter more here than the last fraction of a percent of accuracy
+DEFAULT_QUANTIZATION = "int8"
+
+
+# Function to draw int8 calibration images from the training split and up to size held-out (images, labels)
+# from the test split, the same split as the training script, so the parity check sees no training image
+def load_samples(csv_path=DATASET_PATH, size=5000, calibration_size=500, seed=0):
+    images, labels = load_dataset(csv_path)
+    train_index, _, test_index = split_indices(len(images))
+    rng = np.random.default_rng(seed)
+    calibration_rows = np.sort(rng.choice(train_index, size=min(calibration_size, len(train_index)), replace=False))
+    rows = np.sort(rng.choice(test_index, size=min(size, len(test_index)), replace=False))
+    return images[calibration_rows], images[rows], labels[rows]
+
+
+def export_tflite(model_path=KERAS_MODEL_PATH, output_path=TFLITE_MODEL_PATH, quantization=DEFAULT_QUANTIZATION,
+                  calibration_images=None):
+    """
+    Converts the trained Keras model into a TFLite model.
+
+    Parameters:
+        model_path (str): Path to the Keras model.
+        output_path (str): Where to write the .tflite file.
+        quantization (str): "int8" (weights and activations as int8, about a quarter of the size; needs
+            calibration images) or "float16" (weights stored as float16, about half the size).
+        calibration_images (numpy.ndarray): (N, 28, 28) uint8 images used to calibrate int8 ranges.
+
+    Returns:
+        int: Size of the written model in bytes.
+    """
+    import tensorflow as tf
+    from keras.models import load_model
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_model(model_path))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if calibration_images is None:
+            raise ValueError("int8 quantization needs calibration_images")
+
+        def representative_dataset():
+            for image in calibration_images[:500]:
+                yield [image.reshape(1, 28, 28, 1).astype(np.float32) / 255.]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Unknown quantization {quantization!r}; expected 'float16' or 'int8'")
+
+    # Inputs and outputs stay float32, so callers feed the same normalized crops as to the Keras model
+    tflite_model = converter.convert()
+    with open(output_path, "wb") as file:
+        file.write(tflite_model)
+    return len(tflite_model)
+
+
+class TFLiteClassifier:
+    """
+    Runs the exported alphabet model on the TFLite interpreter.
+
+    Parameters:
+        model_path (str): Path to the .tflite file.
+        num_threads (int): Interpreter threads (default is the interpreter's default).
+    """
+
+    def __init__(self, model_path=TFLITE_MODEL_PATH, num_threads=None):
+        interpreter_class = Interpreter
+        if interpreter_class is None:
+            import tensorflow as tf
+            interpreter_class = tf.lite.Interpreter
+
+        self.interpreter = interpreter_class(model_path=model_path, num_threads=num_threads)
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = None
+
+    def predict(self, batch):
+        """
+        Parameters:
+            batch (numpy.ndarray): (N, 28, 28, 1) float32 crops scaled to [0, 1].
+
+        Returns:
+            numpy.ndarray: (N, 26) class probabilities.
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) != self.batch_size:
+            # Resize the input once per new batch size, then the whole batch runs in one invoke
+            self.interpreter.resize_tensor_input(self.input["index"], batch.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = len(batch)
+
+        self.interpreter.set_tensor(self.input["index"], batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output["index"]).copy()
+
+
+def parity_check(keras_model, classifier, images, labels, max_drop=MAX_ACCURACY_DROP, batch_size=1024):
+    """
+    Compares the TFLite model against the Keras model on the same images.
+
+    Parameters:
+        keras_model: The Keras model (anything with predict(batch)).
+        classifier (TFLiteClassifier): The TFLite model.
+        images (numpy.ndarray): (N, 28, 28) uint8 images.
+        labels (numpy.ndarray): (N,) class indices.
+        max_drop (float): Largest allowed drop in accuracy.
+        batch_size (int): Images per forward pass.
+
+    Returns:
+        dict: {"keras_accuracy", "tflite_accuracy", "agreement", "passed"}
+    """
+    keras_predictions, tflite_predictions = [], []
+    for start in range(0, len(images), batch_size):
+        batch = images[start:start + batch_size].reshape(-1, 28, 28, 1).astype(np.float32) / 255.
+        keras_predictions.append(np.argmax(keras_model.predict(batch, verbose=0), axis=1))
+        tflite_predictions.append(np.argmax(classifier.predict(batch), axis=1))
+
+    keras_predictions = np.concatenate(keras_predictions)
+    tflite_predictions = np.concatenate(tflite_predictions)
+    keras_accuracy = float(np.mean(keras_predictions == labels))
+    tflite_accuracy = float(np.mean(tflite_predictions == labels))
+
+    return {
+        "keras_accuracy": keras_accuracy,
+        "tflite_accuracy": tflite_accuracy,
+        "agreement": float(np.mean(keras_predictions == tflite_predictions)),
+        "passed": keras_accuracy - tflite_accuracy <= max_drop,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the handwritten alphabet model to TFLite and check its accuracy.")
+    parser.add_argument("--model", default=KERAS_MODEL_PATH, help="Keras model to convert")
+    parser.add_argument("-o", "--output", default=TFLITE_MODEL_PATH, help="Where to write the .tflite model")
+    parser.add_argument("--quantization", choices=("int8", "float16"), default=DEFAULT_QUANTIZATION)
+    parser.add_argument("--data", default=DATASET_PATH, help="Dataset CSV to sample calibration and held-out images from")
+    parser.add_argument("--samples", type=int, default=5000, help="Held-out images for the parity check (at most the test split)")
+    parser.add_argument("--max-drop", type=float, default=MAX_ACCURACY_DROP, help="Largest allowed accuracy drop")
+    args = parser.parse_args(argv)
+
+    from keras.models import load_model
+
+    calibration_images, images, labels = load_samples(args.data, args.samples)
+
+    # Export next to the final path and only move the model into place once it passes the parity
+    # check, since the "auto" backend picks up any model found at the final path
+    temp_path = f"{args.output}.tmp"
+    try:
+        size = export_tflite(args.model, temp_path, args.quantization, calibration_images)
+        result = parity_check(load_model(args.model), TFLiteClassifier(temp_path), images, labels, args.max_drop)
+        print(f"Keras accuracy {result['keras_accuracy']:.4f}, TFLite accuracy {result['tflite_accuracy']:.4f}, "
+              f"agreement {result['agreement']:.4f}")
+        if not result["passed"]:
+            print(f"Accuracy dropped by more than {args.max_drop:.2%}; {args.output} was not written, "
+                  "keep using the Keras model.", file=sys.stderr)
+            return 1
+        os.replace(temp_path, args.output)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    print(f"Wrote {args.output} ({size / 1024:.0f} KiB, {os.path.getsize(args.model) / 1024:.0f} KiB as Keras)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# Example usage:
+# python HandwritingTFLite.py --quantization int8
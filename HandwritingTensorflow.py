@@ -1,85 +1,182 @@
+import os
+import threading
+
 import cv2
 import numpy as np
-from keras.models import load_model
-import matplotlib.pyplot as plt
 
-# Load the model once when the script is executed
-nn_model = load_model('handwritten_alphabet_model.h5')
+from HandwritingBatcher import get_batcher
+from HandwritingSegmentation import assemble_text, segment_handwriting
+from HandwritingTFLite import KERAS_MODEL_PATH, TFLITE_MODEL_PATH, TFLiteClassifier
+
 alphabets = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
 
-def unseendata_test(filepath):
+# Backend used for inference: "tflite" (the exported, quantized model on the lightweight interpreter),
+# "keras" (the full model on TensorFlow) or "auto" (tflite when the exported model exists)
+BACKEND = os.environ.get("HANDWRITING_BACKEND", "auto")
+
+class KerasClassifier:
     """
-    Function to process an input image, detect characters in it, and return the detected alphabets.
-    
+    Runs the Keras alphabet model through a compiled forward pass over a whole batch of 28x28 crops.
+    The batch dimension is left open, so names of any length reuse the same traced graph.
+    """
+
+    def __init__(self, model_path=KERAS_MODEL_PATH):
+        import tensorflow as tf
+        from keras.models import load_model
+
+        self.model = load_model(model_path)
+        self._forward = tf.function(
+            lambda batch: self.model(batch, training=False),
+            input_signature=[tf.TensorSpec(shape=(None, 28, 28, 1), dtype=tf.float32)],
+        )
+
+    def predict(self, batch):
+        return self._forward(np.asarray(batch, dtype=np.float32)).numpy()
+
+# The classifier, loaded on first use (not at import) and shared by every caller in the process
+_classifier = None
+_classifier_lock = threading.Lock()
+
+# Function to get the classifier for the configured backend
+def get_classifier(backend=None):
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            backend = backend or BACKEND
+            if backend == "auto":
+                backend = "tflite" if os.path.exists(TFLITE_MODEL_PATH) else "keras"
+            _classifier = TFLiteClassifier(TFLITE_MODEL_PATH) if backend == "tflite" else KerasClassifier(KERAS_MODEL_PATH)
+        return _classifier
+
+def segment_characters(image):
+    """
+    Finds the characters in an image and prepares them for the model.
+
     Parameters:
-    filepath (str): Path to the input image for alphabet detection.
-    
+        image (numpy.ndarray): BGR image.
+
     Returns:
-    List: A list of detected alphabets.
+        numpy.ndarray: (N, 28, 28) uint8 crops, white characters on black, in reading order
+            (line by line, left to right; see HandwritingSegmentation.segment_handwriting).
+    """
+    return segment_handwriting(image)["crops"]
+
+def predict_characters(crops):
+    """
+    Classifies a batch of character crops in a single forward pass, shared with any
+    concurrent callers through the process-wide inference batcher.
+
+    Parameters:
+        crops (numpy.ndarray): (N, 28, 28) uint8 crops.
+
+    Returns:
+        list: (letter, probability) for each crop, in order.
+    """
+    if len(crops) == 0:
+        return []
+
+    batch = crops.reshape(-1, 28, 28, 1).astype(np.float32) / 255.
+    probabilities = get_batcher(lambda merged: get_classifier().predict(merged)).predict(batch)
+    best = probabilities.argmax(axis=1)
+    return [(alphabets[index], float(probabilities[i, index])) for i, index in enumerate(best)]
+
+def recognize_handwriting(filepath):
+    """
+    Reads the handwritten letters in an image, without any plotting.
+
+    Parameters:
+        filepath (str): Path to the input image for alphabet detection.
+
+    Returns:
+        tuple: (list of (letter, probability), crops array), or None if the image cannot be loaded.
     """
-    
     # Read the input image
     image = cv2.imread(filepath)
-    
+
     # Check if image is loaded successfully
     if image is None:
         print(f"Error: The image at '{filepath}' could not be loaded. Please check the file path.")
         return None
-    
-    # Convert the image to grayscale (remove the blur step)
-    grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    
-    # Apply binary thresholding to make characters stand out (tune the threshold value as needed)
-    _, thresh = cv2.threshold(grey, 127, 255, cv2.THRESH_BINARY_INV)
-    
-    # Find contours in the thresholded image
-    contours, hierarchy = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    # List to store preprocessed digits (characters)
-    preprocessed_digits = []
-
-    # Get bounding boxes of contours (characters)
-    boundingBoxes = [cv2.boundingRect(c) for c in contours]
-    (contours, boundingBoxes) = zip(*sorted(zip(contours, boundingBoxes), key=lambda b: b[1][0], reverse=False))
-
-    # Process each contour (character)
-    for c in contours:
-        x, y, w, h = cv2.boundingRect(c)
-        digit = thresh[y:y + h, x:x + w]
-        
-        # Resize and pad each detected digit (character)
-        resized_digit = cv2.resize(digit, (18, 18))
-        padded_digit = np.pad(resized_digit, ((5, 5), (5, 5)), "constant", constant_values=0)
-        
-        preprocessed_digits.append(padded_digit)
-    
-    # Convert list of preprocessed digits to numpy array
-    inp = np.array(preprocessed_digits)
-    
-    # List to store predicted alphabets
-    alphabets_unseen = []
-
-    # Prepare the plot for the detected characters
-    figr = plt.figure(figsize=(len(inp), 4))
-    
-    # Loop through each preprocessed digit, predict and display the result
-    for i, digit in enumerate(preprocessed_digits):
-        [prediction] = nn_model.predict(digit.reshape(1, 28, 28, 1) / 255.)
-        pred = alphabets[np.argmax(prediction)]
-        alphabets_unseen.append(pred)
-        
-        figr.add_subplot(1, len(inp), i + 1)
+
+    crops = segment_characters(image)
+    return predict_characters(crops), crops
+
+def read_handwriting(filepath):
+    """
+    Reads a handwritten image of any number of words and lines (e.g. a whole form) in one call.
+
+    Parameters:
+        filepath (str): Path to the input image.
+
+    Returns:
+        dict: {"text": letters with spaces between words and newlines between lines,
+               "characters": [{"letter", "probability", "line", "word", "box"}]}, or None if the image cannot be loaded.
+    """
+    image = cv2.imread(filepath)
+    if image is None:
+        print(f"Error: The image at '{filepath}' could not be loaded. Please check the file path.")
+        return None
+
+    segments = segment_handwriting(image)
+    predictions = predict_characters(segments["crops"])
+    letters = [letter for letter, _ in predictions]
+
+    characters = [
+        {"letter": letter, "probability": probability, "line": int(line), "word": int(word), "box": tuple(int(v) for v in box)}
+        for (letter, probability), line, word, box in zip(predictions, segments["lines"], segments["words"], segments["boxes"])
+    ]
+    return {"text": assemble_text(letters, segments["lines"], segments["words"]), "characters": characters}
+
+def plot_predictions(crops, predictions):
+    """
+    Draws each character crop with its predicted letter, e.g. for checking the model by hand.
+
+    Parameters:
+        crops (numpy.ndarray): (N, 28, 28) crops from segment_characters.
+        predictions (list): (letter, probability) pairs from predict_characters.
+
+    Returns:
+        matplotlib.figure.Figure: The figure (call plt.show() to display it).
+    """
+    import matplotlib.pyplot as plt  # Only needed for this optional visualization
+
+    figr = plt.figure(figsize=(max(len(crops), 1), 4))
+    for i, (digit, (pred, probability)) in enumerate(zip(crops, predictions)):
+        figr.add_subplot(1, len(crops), i + 1)
         plt.xticks([]); plt.yticks([])  # Hide axis ticks
-        plt.imshow(digit.reshape(28, 28), cmap="gray")
-        plt.title(pred, color='green', fontsize=18, fontweight="bold")
-    
-    # Show the plot
-    plt.show()
-    
+        plt.imshow(digit, cmap="gray")
+        plt.title(f"{pred} {probability:.0%}", color='green', fontsize=18, fontweight="bold")
+    return figr
+
+def unseendata_test(filepath, show=False):
+    """
+    Function to process an input image, detect characters in it, and return the detected alphabets.
+
+    Parameters:
+    filepath (str): Path to the input image for alphabet detection.
+    show (bool): Also plot the detected characters with their predictions (default is False, for servers).
+
+    Returns:
+    List: A list of detected alphabets.
+    """
+    recognized = recognize_handwriting(filepath)
+    if recognized is None:
+        return None
+    predictions, crops = recognized
+
+    if show:
+        import matplotlib.pyplot as plt
+
+        plot_predictions(crops, predictions)
+        plt.show()
+
     # Return the list of detected alphabets
-    return alphabets_unseen
+    return [letter for letter, _ in predictions]
 
 # Example usage
 # detected_alphabets = unseendata_test('Text Recognition Sample.jpg')
 # if detected_alphabets:
 #     print("Alphabets detected:", detected_alphabets)
+# predictions, crops = recognize_handwriting('Text Recognition Sample.jpg')
+# plot_predictions(crops, predictions).savefig('predictions.png')
+# print(read_handwriting('Text Recognition Sample.jpg')["text"])
@@ -0,0 +1,185 @@
+import re
+
+import cv2
+import numpy as np
+
+from MainOCR import load_image, read_source
+from OCRCache import content_key, get_ocr_cache
+from OCRReaderPool import get_reader_pool
+
+# Rectified card size: ID-1 (85.6 x 54 mm) at 10 pixels per mm
+CARD_WIDTH = 856
+CARD_HEIGHT = 540
+
+# A quadrilateral must cover at least this share of the photo to be taken as the card
+MIN_CARD_AREA = 0.2
+
+IC_NUMBER_PATTERN = re.compile(r"^\d{6}-\d{2}-\d{4}$")
+
+# Field regions of each card type, as (x0, y0, x1, y1) fractions of the rectified card, with:
+#   lines: 1 for single-line fields (recognized directly, no text detection), more for multi-line fields
+#   allowlist: characters the field can contain (None for any)
+#   pattern: expression a valid value must match (None for free text)
+LAYOUTS = {
+    "mykad": {
+        "ic_number": {"box": (0.03, 0.20, 0.48, 0.33), "lines": 1, "allowlist": "0123456789-", "pattern": IC_NUMBER_PATTERN},
+        "name": {"box": (0.03, 0.60, 0.68, 0.73), "lines": 2, "allowlist": None, "pattern": None},
+        "address": {"box": (0.03, 0.72, 0.68, 0.97), "lines": 4, "allowlist": None, "pattern": None},
+    },
+    "driving_licence": {
+        "name": {"box": (0.30, 0.25, 0.97, 0.36), "lines": 1, "allowlist": None, "pattern": None},
+        "ic_number": {"box": (0.30, 0.36, 0.75, 0.46), "lines": 1, "allowlist": "0123456789-", "pattern": IC_NUMBER_PATTERN},
+        "licence_class": {"box": (0.30, 0.46, 0.75, 0.56), "lines": 1, "allowlist": None, "pattern": None},
+        "validity": {"box": (0.30, 0.56, 0.97, 0.66), "lines": 1, "allowlist": "0123456789/- ", "pattern": None},
+        "address": {"box": (0.30, 0.66, 0.97, 0.95), "lines": 3, "allowlist": None, "pattern": None},
+    },
+}
+
+# Header words that tell the card types apart, read from the top strip of the rectified card
+CARD_TYPE_KEYWORDS = {
+    "mykad": ("KAD PENGENALAN", "MYKAD", "IDENTITY CARD"),
+    "driving_licence": ("LESEN MEMANDU", "DRIVING LICENCE", "DRIVING LICENSE"),
+}
+HEADER_BOX = (0.0, 0.0, 1.0, 0.2)
+
+
+# Function to order four corner points as top-left, top-right, bottom-right, bottom-left
+def order_corners(points):
+    points = np.asarray(points, dtype=np.float32).reshape(4, 2)
+    sums = points.sum(axis=1)
+    differences = np.diff(points, axis=1).ravel()
+    return np.array([points[np.argmin(sums)], points[np.argmin(differences)],
+                     points[np.argmax(sums)], points[np.argmax(differences)]], dtype=np.float32)
+
+
+# Function to find the card's four corners in a photo, or None if no card-sized quadrilateral is found
+def find_card(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+    # Work on a small copy; the card's outline survives downscaling and edges are much cheaper to find
+    scale = min(1.0, 800 / max(gray.shape))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+
+    edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = MIN_CARD_AREA * small.shape[0] * small.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            return order_corners(approx) / scale
+    return None
+
+
+# Function to warp the card to a flat, landscape CARD_WIDTH x CARD_HEIGHT image
+# (a photo in which no card is found is taken to be cropped to the card already)
+def rectify_card(img):
+    corners = find_card(img)
+    if corners is None:
+        height, width = img.shape[:2]
+        corners = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+
+    # Portrait outlines are rotated a quarter turn so the card comes out landscape
+    top, left = np.linalg.norm(corners[1] - corners[0]), np.linalg.norm(corners[3] - corners[0])
+    if left > top:
+        corners = np.roll(corners, -1, axis=0)
+
+    target = np.array([[0, 0], [CARD_WIDTH, 0], [CARD_WIDTH, CARD_HEIGHT], [0, CARD_HEIGHT]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(img, matrix, (CARD_WIDTH, CARD_HEIGHT))
+
+
+# Function to cut a region, given as fractions of the card, out of the rectified card
+def crop_box(card, box):
+    x0, y0, x1, y1 = box
+    return card[int(y0 * CARD_HEIGHT):int(y1 * CARD_HEIGHT), int(x0 * CARD_WIDTH):int(x1 * CARD_WIDTH)]
+
+
+# Function to read a field crop, returning (text, confidence)
+def read_field(reader, crop, field):
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    if field["lines"] == 1:
+        # The region is already the text line, so detection is skipped and only recognition runs
+        height, width = gray.shape
+        detections = reader.recognize(gray, horizontal_list=[[0, width, 0, height]], free_list=[],
+                                      allowlist=field["allowlist"], detail=1)
+    else:
+        detections = reader.readtext(gray, allowlist=field["allowlist"], detail=1)
+        detections = sorted(detections, key=lambda detection: (min(p[1] for p in detection[0]), min(p[0] for p in detection[0])))
+
+    detections = [detection for detection in detections if detection[1].strip()]
+    if not detections:
+        return "", 0.0
+    text = " ".join(detection[1].strip() for detection in detections)
+    return text, float(np.mean([detection[2] for detection in detections]))
+
+
+# Function to clean up a field value, e.g. "900101 14 5678" -> "900101-14-5678" for IC numbers
+def normalize_field(name, text):
+    if name == "ic_number":
+        digits = re.sub(r"\D", "", text)
+        if len(digits) == 12:
+            return f"{digits[:6]}-{digits[6:8]}-{digits[8:]}"
+    return " ".join(text.split())
+
+
+# Function to tell the card type from the header words printed on the card
+def detect_card_type(reader, card):
+    header = " ".join(reader.readtext(crop_box(card, HEADER_BOX), detail=0)).upper()
+    for card_type, card_keywords in CARD_TYPE_KEYWORDS.items():
+        if any(keyword in header for keyword in card_keywords):
+            return card_type
+    return None
+
+
+def extract_card_fields(image, card_type=None):
+    """
+    Reads the fields of a Malaysian ID card photo (name, IC number, address, ...).
+
+    The card is found and rectified to a fixed size first, so every field sits at a known
+    place; only those small regions are OCR-ed, and single-line fields skip text detection.
+    Results are cached by image content.
+
+    Parameters:
+        image (str | bytes | numpy.ndarray): Image path, encoded image bytes or decoded BGR array.
+        card_type (str): "mykad" or "driving_licence" (default is detected from the card's header).
+
+    Returns:
+        dict: {"card_type": str | None, "fields": {field: {"value", "confidence", "valid"}}}
+            valid is False when a field has a known format (e.g. the IC number) and the value does not match it.
+    """
+    data = read_source(image)
+    pool = get_reader_pool()
+    key = content_key(data, task="id_fields", card_type=card_type, layouts=LAYOUTS, languages=pool.languages)
+    cache = get_ocr_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    img = load_image(data)
+    if img is None:
+        raise ValueError("Could not decode the ID card image")
+    card = rectify_card(img)
+
+    with pool.reader() as reader:
+        if card_type is None:
+            card_type = detect_card_type(reader, card)
+
+        fields = {}
+        for name, field in LAYOUTS.get(card_type, {}).items():
+            text, confidence = read_field(reader, crop_box(card, field["box"]), field)
+            value = normalize_field(name, text)
+            valid = bool(value) and (field["pattern"] is None or bool(field["pattern"].match(value)))
+            fields[name] = {"value": value, "confidence": confidence, "valid": valid}
+
+    result = {"card_type": card_type, "fields": fields}
+    cache.put(key, result)
+    return result
+
+
+# Example usage:
+# fields = extract_card_fields("NationalIC.png")
+# print(fields["card_type"], fields["fields"]["ic_number"])
@@ -0,0 +1,135 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from ImageTiles import tile_spans
+
+# An ID card is 3.37 in wide; photos usually show it with some margin around it
+FRAME_WIDTH_INCHES = 4.5
+
+# Preprocessing profiles, from lowest latency to best quality:
+#   target_dpi: downscale until the frame is at most this many pixels per inch (None keeps full resolution)
+#   denoise: "never", "auto" (only when the estimated noise is above noise_threshold) or "always"
+#   strength: filter strength h of the non-local means denoising
+#   denoise_tile: tile side in pixels for parallel denoising (None denoises the whole image at once, which
+#                 OpenCV already spreads over its own threads). Only "thorough" denoises a full-resolution
+#                 image, large enough for tiles to pay off, and they also keep it parallel where OpenCV's
+#                 threads are disabled (e.g. cv2.setNumThreads(0) in worker processes)
+PROFILES = {
+    "fast": {"target_dpi": 200, "denoise": "never", "noise_threshold": None, "strength": 0, "denoise_tile": None},
+    "balanced": {"target_dpi": 300, "denoise": "auto", "noise_threshold": 4.0, "strength": 15, "denoise_tile": None},
+    "thorough": {"target_dpi": None, "denoise": "always", "noise_threshold": None, "strength": 30, "denoise_tile": 512},
+}
+DEFAULT_PROFILE = "balanced"
+
+# Non-local means windows (as in the original pipeline). A pixel's result depends on pixels up to
+# TEMPLATE_WINDOW // 2 + SEARCH_WINDOW // 2 away, so tiles overlap by twice that reach (plus a margin)
+TEMPLATE_WINDOW = 7
+SEARCH_WINDOW = 21
+DENOISE_OVERLAP = 2 * (TEMPLATE_WINDOW // 2 + SEARCH_WINDOW // 2) + 2
+
+
+# Function to estimate the standard deviation of the noise in a grayscale image (Immerkaer's method):
+# a Laplacian-difference kernel cancels smooth image content, leaving mostly noise
+def estimate_noise(gray):
+    height, width = gray.shape
+    if height < 3 or width < 3:
+        return 0.0
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    response = cv2.filter2D(gray.astype(np.float32), -1, kernel)[1:-1, 1:-1]
+    return float(np.sqrt(np.pi / 2) * np.abs(response).sum() / (6 * (width - 2) * (height - 2)))
+
+
+# Function to downscale an image so its width is at most target_dpi pixels per inch of the frame
+def downscale(img, target_dpi, frame_width_inches=FRAME_WIDTH_INCHES):
+    if target_dpi is None:
+        return img, 1.0
+    scale = target_dpi * frame_width_inches / img.shape[1]
+    if scale >= 1:
+        return img, 1.0
+    return cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+# Function to denoise a grayscale image, tile by tile in parallel when tile_size is given
+def denoise(gray, strength, tile_size=None, max_workers=None):
+    def denoise_region(region):
+        return cv2.fastNlMeansDenoising(region, None, strength, TEMPLATE_WINDOW, SEARCH_WINDOW)
+
+    height, width = gray.shape
+    if tile_size is None or (height <= tile_size and width <= tile_size):
+        return denoise_region(gray)
+
+    # Only each tile's core, more than the filter's reach away from a cut edge, is written
+    # back, so the result is identical to denoising the whole image at once
+    tiles = [
+        (y0, y1, x0, x1)
+        for y0, y1 in tile_spans(height, tile_size, DENOISE_OVERLAP)
+        for x0, x1 in tile_spans(width, tile_size, DENOISE_OVERLAP)
+    ]
+    output = np.empty_like(gray)
+    half = DENOISE_OVERLAP // 2
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda tile: denoise_region(gray[tile[0]:tile[1], tile[2]:tile[3]]), tiles)
+        for (y0, y1, x0, x1), result in zip(tiles, results):
+            top = 0 if y0 == 0 else half
+            left = 0 if x0 == 0 else half
+            bottom = y1 - y0 if y1 == height else y1 - y0 - (DENOISE_OVERLAP - half)
+            right = x1 - x0 if x1 == width else x1 - x0 - (DENOISE_OVERLAP - half)
+            output[y0 + top:y0 + bottom, x0 + left:x0 + right] = result[top:bottom, left:right]
+    return output
+
+
+def preprocess_image(img, profile=DEFAULT_PROFILE, max_workers=None):
+    """
+    Prepares an ID photo for OCR: grayscale, downscale, optional denoising and adaptive thresholding.
+
+    Parameters:
+        img (numpy.ndarray): BGR or grayscale image.
+        profile (str | dict): "fast", "balanced" or "thorough", or a dict with the same keys as PROFILES.
+        max_workers (int): Threads used for tiled denoising.
+
+    Returns:
+        tuple: (binary image, report)
+            - Thresholded image, ready for OCR.
+            - {"profile", "scale", "noise", "denoised", "timings": {step: seconds}}
+    """
+    settings = PROFILES[profile] if isinstance(profile, str) else profile
+    timings = {}
+    report = {"profile": profile if isinstance(profile, str) else "custom", "scale": 1.0, "noise": None,
+              "denoised": False, "timings": timings}
+
+    start = time.perf_counter()
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    timings["grayscale"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gray, report["scale"] = downscale(gray, settings["target_dpi"])
+    timings["downscale"] = time.perf_counter() - start
+
+    run_denoise = settings["denoise"] == "always"
+    if settings["denoise"] == "auto":
+        start = time.perf_counter()
+        report["noise"] = estimate_noise(gray)
+        timings["noise_estimate"] = time.perf_counter() - start
+        run_denoise = report["noise"] > settings["noise_threshold"]
+
+    if run_denoise:
+        start = time.perf_counter()
+        gray = denoise(gray, settings["strength"], settings["denoise_tile"], max_workers)
+        timings["denoise"] = time.perf_counter() - start
+        report["denoised"] = True
+
+    # Thresholding to get a binary image (adaptive thresholding)
+    start = time.perf_counter()
+    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+    timings["threshold"] = time.perf_counter() - start
+
+    return thresh, report
+
+
+# Example usage:
+# thresh, report = preprocess_image(cv2.imread("NationalIC.png"), profile="fast")
+# print(report["profile"], report["timings"])
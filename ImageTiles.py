@@ -0,0 +1,12 @@
+import math
+
+
+# Function to split a length into n equal, overlapping spans no longer than tile_size
+def tile_spans(length, tile_size, overlap):
+    count = max(1, math.ceil((length - overlap) / max(tile_size - overlap, 1)))
+    size = math.ceil((length + (count - 1) * overlap) / count)
+    return [(i * (size - overlap), min(i * (size - overlap) + size, length)) for i in range(count)]
+
+
+# Example usage:
+# print(tile_spans(3300, 1280, 160))  # [(0, 1207), (1047, 2254), (2094, 3300)]
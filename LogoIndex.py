@@ -0,0 +1,265 @@
+import json
+import os
+
+import imagehash
+import numpy as np
+from PIL import Image, ImageChops
+
+# Hash functions combined into one fingerprint per logo
+HASH_FUNCTIONS = (imagehash.average_hash, imagehash.phash, imagehash.dhash)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+DEFAULT_LOGO_FOLDER = "Official Logo"
+INDEX_FILENAME = "logo_index.json"
+INDEX_VERSION = 2  # Bump whenever the fingerprint definition changes, so saved indexes are rebuilt
+
+
+# Function to pack an ImageHash's boolean matrix into a single integer
+def pack_hash(image_hash):
+    return int.from_bytes(np.packbits(image_hash.hash.flatten()).tobytes(), "big")
+
+
+# Function to crop away the uniform margin around an image's content, so that a logo hashes
+# the same whether it comes with its own canvas, is tightly embedded or is cut out of a page
+def trim_margins(img, tolerance=16):
+    if img.mode in ("RGBA", "LA", "P"):
+        # Put transparent logos on a white background first
+        img = img.convert("RGBA")
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    gray = img.convert("L")
+
+    difference = ImageChops.difference(gray, Image.new("L", gray.size, gray.getpixel((0, 0))))
+    bbox = difference.point(lambda value: 255 if value > tolerance else 0).getbbox()
+    return gray.crop(bbox) if bbox else gray
+
+# Function to compute the packed average, perceptual and difference hashes of an image
+def compute_hashes(img, hash_size=8):
+    img = trim_margins(img)
+    return tuple(pack_hash(hash_function(img, hash_size)) for hash_function in HASH_FUNCTIONS)
+
+
+# Function to compute the combined Hamming distance between two fingerprints
+def hamming_distance(hashes1, hashes2):
+    return sum(bin(h1 ^ h2).count("1") for h1, h2 in zip(hashes1, hashes2))
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over fingerprints under the combined Hamming distance.
+    The triangle inequality lets a search skip every subtree whose edge distance
+    is further than the search radius from the query's distance to the node.
+    """
+
+    def __init__(self):
+        self.root = None  # [hashes, value, {distance: child}]
+
+    def add(self, hashes, value):
+        if self.root is None:
+            self.root = [hashes, value, {}]
+            return
+
+        node = self.root
+        while True:
+            distance = hamming_distance(hashes, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hashes, value, {}]
+                return
+            node = child
+
+    # Function to find every value within max_distance of the query, closest first
+    def search(self, hashes, max_distance):
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hashes, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[1]))
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return sorted(matches, key=lambda match: match[0])
+
+    # Function to find the closest value, shrinking the search radius as better matches are found
+    def nearest(self, hashes, max_distance):
+        best = None
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hashes, node[0])
+            if distance <= max_distance:
+                best = (distance, node[1])
+                max_distance = distance - 1
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return best
+
+
+class LogoIndex:
+    """
+    Index of the official bank logos, fingerprinted once with average, perceptual and
+    difference hashes and searched with a BK-tree. Each logo is stored under its bank
+    name, taken from the file name (e.g. "Official Logo/maybank.png" -> "maybank").
+
+    A similarity threshold applies to the three hashes together, not to the average hash
+    alone as the original comparison did: at hash_size 8, 90% similarity allows a combined
+    distance of 19 out of 192 bits (the original allowed 6 out of the average hash's 64).
+    A match therefore needs the perceptual and difference hashes to agree as well, while a
+    single hash may differ by more than 6 bits if the other two are close.
+
+    Parameters:
+        hash_size (int): Size of each hash; every hash has hash_size ** 2 bits.
+    """
+
+    def __init__(self, hash_size=8):
+        self.hash_size = hash_size
+        self.entries = []  # List of (bank, filename, hashes)
+        self.tree = BKTree()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def max_distance(self):
+        return len(HASH_FUNCTIONS) * self.hash_size ** 2
+
+    def add(self, bank, filename, hashes):
+        self.entries.append((bank, filename, hashes))
+        self.tree.add(hashes, len(self.entries) - 1)
+
+    # Function to add every logo in a folder to the index
+    def add_folder(self, folder_path):
+        for filename in sorted(os.listdir(folder_path)):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            with Image.open(os.path.join(folder_path, filename)) as img:
+                hashes = compute_hashes(img, self.hash_size)
+            self.add(os.path.splitext(filename)[0].lower(), filename, hashes)
+        return self
+
+    # Function to convert a similarity percentage into the largest allowed combined distance
+    # (over all three hashes, e.g. 90% -> 19 of 192 bits at hash_size 8)
+    def distance_limit(self, similarity_threshold):
+        return int((1 - similarity_threshold / 100) * self.max_distance)
+
+    # Function to convert a distance into a similarity percentage
+    def similarity(self, distance):
+        return 100 * (1 - distance / self.max_distance)
+
+    # Function to find the closest entry to a fingerprint, optionally only among one bank's logos
+    def best_match(self, hashes, similarity_threshold=90, bank=None):
+        limit = self.distance_limit(similarity_threshold)
+        if bank is None:
+            best = self.tree.nearest(hashes, limit)
+        else:
+            matches = [match for match in self.tree.search(hashes, limit) if self.entries[match[1]][0] == bank]
+            best = matches[0] if matches else None
+
+        if best is None:
+            return None
+
+        distance, entry_index = best
+        bank, filename, _ = self.entries[entry_index]
+        return {"bank": bank, "filename": filename, "distance": distance, "similarity": self.similarity(distance)}
+
+    def query(self, img, similarity_threshold=90):
+        """
+        Finds the official logo closest to an image.
+
+        Parameters:
+            img (PIL.Image | tuple): The image to look up, or its precomputed fingerprint.
+            similarity_threshold (int): Minimum similarity percentage for a match.
+
+        Returns:
+            dict | None: {"bank", "filename", "distance", "similarity"} of the best match, or None.
+        """
+        hashes = img if isinstance(img, tuple) else compute_hashes(img, self.hash_size)
+        return self.best_match(hashes, similarity_threshold)
+
+    # Function to check whether an image matches a specific bank's logo
+    def matches_bank(self, img, bank, similarity_threshold=90):
+        hashes = img if isinstance(img, tuple) else compute_hashes(img, self.hash_size)
+        return self.best_match(hashes, similarity_threshold, bank) is not None
+
+    def save(self, index_path):
+        data = {
+            "version": INDEX_VERSION,
+            "hash_size": self.hash_size,
+            "entries": [
+                {"bank": bank, "filename": filename, "hashes": [format(h, "x") for h in hashes]}
+                for bank, filename, hashes in self.entries
+            ],
+        }
+        # Write to a temporary file first so concurrent workers never read a half-written index
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path):
+        with open(index_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Logo index {index_path} has version {data.get('version')}, expected {INDEX_VERSION}")
+
+        index = cls(data["hash_size"])
+        for entry in data["entries"]:
+            index.add(entry["bank"], entry["filename"], tuple(int(h, 16) for h in entry["hashes"]))
+        return index
+
+
+# Indexes already loaded in this process, keyed by (index path, hash size)
+_loaded_indexes = {}
+
+
+def load_logo_index(folder_path=DEFAULT_LOGO_FOLDER, index_path=None, hash_size=8):
+    """
+    Loads the persisted logo index for a folder, rebuilding (and saving) it when it is
+    missing, older than any logo in the folder, or lists a different set of logos (one was
+    added or deleted). Indexes are cached per process.
+
+    Parameters:
+        folder_path (str): Folder with the official logos.
+        index_path (str): Where the index is persisted (default is logo_index.json inside the folder).
+        hash_size (int): Size of each hash.
+
+    Returns:
+        LogoIndex: The index of every logo in the folder.
+    """
+    if index_path is None:
+        index_path = os.path.join(folder_path, INDEX_FILENAME)
+
+    cached = _loaded_indexes.get((index_path, hash_size))
+    if cached is not None:
+        return cached
+
+    logo_files = [filename for filename in os.listdir(folder_path) if filename.lower().endswith(IMAGE_EXTENSIONS)]
+    logo_mtimes = [os.path.getmtime(os.path.join(folder_path, filename)) for filename in logo_files]
+    index = None
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= max(logo_mtimes, default=0):
+        try:
+            index = LogoIndex.load(index_path)
+        except ValueError:
+            index = None  # Saved with an older fingerprint definition
+        if index is not None and index.hash_size != hash_size:
+            index = None
+        # A deleted logo leaves every mtime unchanged, so compare the files the index was built from
+        if index is not None and sorted(filename for _, filename, _ in index.entries) != sorted(logo_files):
+            index = None
+
+    if index is None:
+        index = LogoIndex(hash_size).add_folder(folder_path)
+        index.save(index_path)
+
+    _loaded_indexes[(index_path, hash_size)] = index
+    return index
+
+
+# Example usage:
+# index = load_logo_index("Official Logo")
+# with Image.open("logo.png") as img:
+#     print(index.query(img, similarity_threshold=90))
@@ -1,70 +1,204 @@
 import cv2
-import easyocr
+import numpy as np
 import re
+from concurrent.futures import ThreadPoolExecutor
+from ImagePreprocessing import DEFAULT_PROFILE, PROFILES, preprocess_image
+from OCRCache import content_key, get_ocr_cache
+from OCRReaderPool import PooledReader, get_reader_pool
 
-# Initialize EasyOCR reader (GPU-enabled if available)
-reader = easyocr.Reader(['en'], gpu=True)
+# EasyOCR readers come from the shared pool: created on first use, CPU-only, reused across calls
 keywords = ["driving licence", "national identity", "national card", "kad pengenalan", "card"]
 
-def extract_text_and_check_keywords(image_path, keywords):
+# Images handed to one reader at a time in batch mode, and crops recognized per forward pass
+IMAGES_PER_BATCH = 8
+RECOGNITION_BATCH_SIZE = 16
+
+# Function to keep "from MainOCR import reader" working: the module-level reader is now created on
+# first access, and its calls run on the pool's readers
+def __getattr__(name):
+    if name == "reader":
+        return PooledReader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Function to check if any of the keywords are present in the extracted text
+def contains_keywords(text, keywords):
+    """
+    Check if any of the keywords are present in the extracted text.
+    Returns True if any keyword is found, False otherwise.
+    """
+    for keyword in keywords:
+        if re.search(keyword, text, re.IGNORECASE):
+            return True
+    return False
+
+# Function to check the detected text for keywords, returning (found_keywords, national_card)
+def check_keywords(result, keywords):
+    # Initialize national card variable
+    national_card = False
+    found_keywords = False
+
+    # Check for keywords in the detected text
+    for text in result:
+        if contains_keywords(text, keywords):
+            found_keywords = True
+            if contains_keywords(text, keywords):
+                national_card = True
+            break  # Stop after finding the first match
+
+    return found_keywords, national_card
+
+# Function to read an image given as a path into its encoded bytes (bytes and decoded arrays are kept as is)
+def read_source(source):
+    if isinstance(source, (np.ndarray, bytes, bytearray, memoryview)):
+        return source
+    with open(source, "rb") as file:
+        return file.read()
+
+# Function to load an image given as a path, encoded bytes or an already decoded array
+def load_image(source):
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.imread(source)
+
+# Function to build the OCR cache key of an image: its content plus everything that changes the OCR output
+def ocr_cache_key(data, profile):
+    settings = PROFILES[profile] if isinstance(profile, str) else profile
+    return content_key(data, task="id_text", preprocessing=settings, languages=get_reader_pool().languages)
+
+# Function to look an image up in the OCR cache, returning (detected text, report) or None
+def cached_ocr(key):
+    cached = get_ocr_cache().get(key)
+    if cached is None:
+        return None
+    return list(cached["result"]), dict(cached["report"], cached=True)
+
+def extract_text_and_check_keywords(image_path, keywords, profile=DEFAULT_PROFILE, return_report=False):
     """
     Extracts text from an image using OCR and checks for specific keywords.
     
     Parameters:
         image_path (str): Path to the input image.
         keywords (list): List of keywords to search for in the extracted text.
+        profile (str): Preprocessing profile: "fast", "balanced" or "thorough" (the original full-resolution pipeline).
+        return_report (bool): Also return the preprocessing report (profile, scale, noise and per-step timings).
     
     Returns:
-        tuple: (bool, bool, list)
+        tuple: (bool, bool, list), plus the preprocessing report if return_report is True
             - Boolean indicating if any of the keywords were found.
             - Boolean indicating if "national card" or related keywords were found.
             - List of detected text (without bounding boxes or confidence scores).
     """
-    # Load the image
-    img = cv2.imread(image_path)
+    # Load the image; an image already OCR-ed with the same settings is served from the cache
+    data = read_source(image_path)
+    key = ocr_cache_key(data, profile)
+    cached = cached_ocr(key)
 
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if cached is not None:
+        result, report = cached
+    else:
+        img = load_image(data)
 
-    # Denoising and enhancing contrast for better OCR results
-    gray = cv2.fastNlMeansDenoising(gray, None, 30, 7, 21)
+        # Grayscale, downscale, denoise (when the profile and the noise level call for it) and threshold
+        thresh, report = preprocess_image(img, profile)
+        report["cached"] = False
 
-    # Thresholding to get a binary image (adaptive thresholding)
-    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                   cv2.THRESH_BINARY_INV, 11, 2)
+        # Use EasyOCR to detect text from the entire image
+        result = get_reader_pool().readtext(thresh, detail=0)  # Use detail=0 to return only the text
+        get_ocr_cache().put(key, {"result": result, "report": report})
 
-    # Use EasyOCR to detect text from the entire image
-    result = reader.readtext(thresh, detail=0)  # Use detail=0 to return only the text
+    # Check if any of the keywords are present in the extracted text
+    found_keywords, national_card = check_keywords(result, keywords)
 
-    # Function to check if any of the keywords are present in the extracted text
-    def contains_keywords(text, keywords):
-        """
-        Check if any of the keywords are present in the extracted text.
-        Returns True if any keyword is found, False otherwise.
-        """
-        for keyword in keywords:
-            if re.search(keyword, text, re.IGNORECASE):
-                return True
-        return False
+    # Return whether keywords were found, national_card status, and the list of detected text
+    if return_report:
+        return found_keywords, national_card, result, report
+    return found_keywords, national_card, result
 
-    # Initialize national card variable
-    national_card = False
-    found_keywords = False
 
-    # Check for keywords in the detected text
-    for text in result:
-        if contains_keywords(text, keywords):
-            found_keywords = True
-            if contains_keywords(text, keywords):
-                national_card = True
-            break  # Stop after finding the first match
+# Function to pad binary images with background to one shape, so they can go through detection together
+def pad_to_common_shape(images):
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    return [cv2.copyMakeBorder(image, 0, height - image.shape[0], 0, width - image.shape[1], cv2.BORDER_CONSTANT, value=0)
+            for image in images]
 
-    # Return whether keywords were found, national_card status, and the list of detected text
-    return found_keywords, national_card, result
+def extract_text_and_check_keywords_batch(images, keywords, profile=DEFAULT_PROFILE, return_report=False,
+                                          images_per_batch=IMAGES_PER_BATCH, batch_size=RECOGNITION_BATCH_SIZE,
+                                          max_workers=None):
+    """
+    Batch version of extract_text_and_check_keywords for re-screening many ID images in one call.
+
+    Images already in the OCR cache are answered from it. The others are loaded and preprocessed
+    in parallel, sorted by size and grouped into batches of similar shape. Each batch is padded to
+    one shape and sent through the detector and recognizer of one pooled reader together
+    (readtext_batched), and batches run in parallel on the pool's readers.
+
+    Parameters:
+        images (list): Image paths, encoded image bytes or decoded BGR arrays.
+        keywords (list): List of keywords to search for in the extracted text.
+        profile (str): Preprocessing profile: "fast", "balanced" or "thorough".
+        return_report (bool): Also return each image's preprocessing report.
+        images_per_batch (int): Images detected together by one reader.
+        batch_size (int): Text crops recognized per forward pass.
+        max_workers (int): Threads for preprocessing and for running batches (default is the reader pool's size).
+
+    Returns:
+        list: One tuple per image, in input order, as returned by extract_text_and_check_keywords
+            (None for an image that could not be decoded).
+    """
+    pool = get_reader_pool()
+    max_workers = max_workers or pool.size
+
+    cache = get_ocr_cache()
+    results = [None] * len(images)
+
+    def finish(i, result, report):
+        found_keywords, national_card = check_keywords(result, keywords)
+        results[i] = (found_keywords, national_card, result, report) if return_report else (found_keywords, national_card, result)
+
+    def prepare(source):
+        data = read_source(source)
+        key = ocr_cache_key(data, profile)
+        cached = cached_ocr(key)
+        if cached is not None:
+            return key, cached, None
+        img = load_image(data)
+        if img is None:
+            return key, None, None
+        thresh, report = preprocess_image(img, profile)
+        report["cached"] = False
+        return key, None, (thresh, report)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        keys, prepared = [], []
+        for i, (key, cached, item) in enumerate(executor.map(prepare, images)):
+            keys.append(key)
+            prepared.append(item)
+            if cached is not None:
+                finish(i, *cached)
+
+        # Similar shapes go in the same batch, so padding them to one shape adds little
+        order = sorted((i for i, item in enumerate(prepared) if item is not None), key=lambda i: prepared[i][0].shape)
+        batches = [order[start:start + images_per_batch] for start in range(0, len(order), images_per_batch)]
+
+        def recognize(batch):
+            padded = pad_to_common_shape([prepared[i][0] for i in batch])
+            with pool.reader() as reader:
+                return reader.readtext_batched(padded, batch_size=batch_size, detail=0)
+
+        for batch, batch_results in zip(batches, executor.map(recognize, batches)):
+            for i, result in zip(batch, batch_results):
+                cache.put(keys[i], {"result": result, "report": prepared[i][1]})
+                finish(i, result, prepared[i][1])
+
+    return results
 
 
 # Call the function to extract text and check for keywords
 # found_keywords, national_card, result = extract_text_and_check_keywords('NationalIC.png', keywords)
+# results = extract_text_and_check_keywords_batch(['NationalIC.png', 'DrivingLicence.png'], keywords, profile="fast")
 
 # # Print the results
 # print(f"National card related keywords found: {national_card}")
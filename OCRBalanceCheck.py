@@ -1,61 +1,69 @@
-import fitz  # PyMuPDF
 import re
 from datetime import datetime
 from dateutil.relativedelta import relativedelta  # To handle accurate date differences
+from DocumentSession import open_session
+from ApplicantMatcher import DEFAULT_THRESHOLD, TokenIndex
+from StatementParser import Statement, StatementAccumulator, parse_statement
+from StatementTemplates import DEFAULT_DATE_FORMATS, select_template
+from TransactionTable import RunningBalanceVerifier, TableExtractor, check_transaction_table
 
 # Function to extract text from the PDF
 def extract_text(pdf_path):
-    # Open the PDF file
-    doc = fitz.open(pdf_path)
-    
-    # Extract text from each page
-    text = ""
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        text += page.get_text("text")  # Extract text from the page
+    # Use the shared session if one is given, otherwise open the PDF file
+    with open_session(pdf_path) as session:
+        # Extract text from each page (memoized by the session)
+        text = session.text()
 
     # Replace multiple spaces with a single space and ensure proper line breaks
     text = ' '.join(text.split())  # Replace all whitespace sequences with a single space
     return text
 
+# Function to accept either statement text or an already parsed Statement
+def as_statement(text):
+    return text if isinstance(text, Statement) else parse_statement(text)
+
+# Function to score how well a name or address appears in the text (1.0 for an exact match)
+def presence_score(text, phrase, index=None):
+    text = text.text if isinstance(text, Statement) else text
+
+    # Check if the phrase appears in the text as is (case insensitive)
+    if re.search(re.escape(phrase), text, re.IGNORECASE) is not None:
+        return 1.0
+
+    # Otherwise tolerate OCR noise, spacing and abbreviations ("Jalan" vs "Jln", "No 1" vs "No. 1")
+    if index is None:
+        index = TokenIndex().add(0, text)
+    return index.search(phrase).get(0, 0.0)
+
 # Function to check if a specific name is in the text
-def is_name_present(text, name):
-    # Check if the name appears in the text (case insensitive)
-    return re.search(re.escape(name), text, re.IGNORECASE) is not None
+def is_name_present(text, name, threshold=DEFAULT_THRESHOLD):
+    return presence_score(text, name) >= threshold
 
 # Function to check if a specific address is in the text
-def is_address_present(text, address):
-    # Check if the address appears in the text (case insensitive)
-    return re.search(re.escape(address), text, re.IGNORECASE) is not None
+def is_address_present(text, address, threshold=DEFAULT_THRESHOLD):
+    return presence_score(text, address) >= threshold
 
 # Function to extract the statement date
 def extract_statement_date(text):
-    # Regex pattern to match a date (e.g., MM/DD/YYYY or DD/MM/YYYY)
-    date_pattern = re.compile(r"STATEMENT DATE\s*[:\-\s]*([0-9]{2}/[0-9]{2}/[0-9]{2,4})")
-    date_match = re.search(date_pattern, text)
-
-    if date_match:
-        return date_match.group(1)  # Return the matched date (e.g., "31/10/24")
-    return None
+    # The statement date (e.g., "31/10/24") is picked up by the single-pass parser
+    return as_statement(text).statement_date
 
 # Function to check if the document is a bank statement based on keywords
 def is_bank_statement(text):
-    # Regex patterns to search for "STATEMENT BALANCE" and "SAVINGS ACCOUNT"
-    balance_pattern = re.compile(r"STATEMENT BALANCE", re.IGNORECASE)
-    account_pattern = re.compile(r"SAVINGS ACCOUNT", re.IGNORECASE)
-    
-    # Search for keywords in the text
-    if balance_pattern.search(text) and account_pattern.search(text):
-        return True
-    return False
+    # Both "STATEMENT BALANCE" and "SAVINGS ACCOUNT" must appear in the text
+    return as_statement(text).is_bank_statement
 
 # Function to check if the date is within the last 6 months
-def is_within_last_6_months(statement_date_str):
-    # Parse the statement date (assuming the format is DD/MM/YY or DD/MM/YYYY)
-    try:
-        statement_date = datetime.strptime(statement_date_str, "%d/%m/%y")  # Handle short year format (YY)
-    except ValueError:
-        statement_date = datetime.strptime(statement_date_str, "%d/%m/%Y")  # Handle full year format (YYYY)
+def is_within_last_6_months(statement_date_str, date_formats=DEFAULT_DATE_FORMATS):
+    # Parse the statement date with the first of the bank's formats that fits (default DD/MM/YY, then DD/MM/YYYY)
+    for date_format in date_formats:
+        try:
+            statement_date = datetime.strptime(statement_date_str, date_format)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"Statement date {statement_date_str!r} matches none of {date_formats}")
 
     current_date = datetime.now()
 
@@ -71,41 +79,17 @@ def is_within_last_6_months(statement_date_str):
 
 # Function to extract and calculate total debits and credits from the OCR text
 def calculate_transactions(text):
-    # Regex pattern to match the transaction amounts with - or + signs
-    transaction_pattern = re.compile(r"(\d+\.\d+)([+-])")  # This will match amounts like 10.10- or 19.08+
-    amounts = re.findall(transaction_pattern, text)
-    
-    total_debits = 0
-    total_credits = 0
-
-    # Iterate over all the matched amounts
-    for amount, sign in amounts:
-        amount_value = float(amount)  # Convert amount to float
-        if sign == '-':  # Debit (money going out)
-            total_debits += amount_value
-        elif sign == '+':  # Credit (money coming in)
-            total_credits += amount_value
-    
-    # Calculate the total balance from the given "Ending Balance"
-    ending_balance_pattern = re.compile(r"ENDING BALANCE\s*[:\-\s]*([\d,]+\.\d{2})")
-    ending_balance_match = re.search(ending_balance_pattern, text)
-    
-    if ending_balance_match:
-        ending_balance = float(ending_balance_match.group(1).replace(",", ""))
-    else:
+    statement = as_statement(text)
+
+    if statement.ending_balance is None:
         return None, None, None
 
-    return total_debits, total_credits, ending_balance
+    return statement.total_debits, statement.total_credits, statement.ending_balance
 
 # Function to extract the starting balance
 def extract_starting_balance(text):
-    # Regex pattern to extract the starting balance (usually appears in a date line, or the first balance)
-    starting_balance_pattern = re.compile(r"(\d+\.\d+)\s+\d{2}/\d{2}/\d{2}")  # Look for the first balance after the date
-    starting_balance_match = re.search(starting_balance_pattern, text)
-    
-    if starting_balance_match:
-        return float(starting_balance_match.group(1))
-    return None
+    # The first balance followed by a date is taken as the starting balance
+    return as_statement(text).starting_balance
 
 # Function to check if balances tally
 def check_balance_tallies(starting_balance, total_debits, total_credits, ending_balance):
@@ -115,57 +99,176 @@ def check_balance_tallies(starting_balance, total_debits, total_credits, ending_
     return False
 
 def extract_ending_balance(text):
-    # Regex pattern to match the "ENDING BALANCE"
-    ending_balance_pattern = re.compile(r"ENDING BALANCE\s*[:\-\s]*([\d,]+\.\d{2})")
-    ending_balance_match = re.search(ending_balance_pattern, text)
-    
-    if ending_balance_match:
-        return float(ending_balance_match.group(1).replace(",", ""))
-    return None
-
-# Main method to process the bank statement
-def process_bank_statement(pdf_path, name, address):
-    # Extract the OCR text from the bank statement (PDF or image)
-    ocr_text = extract_text(pdf_path)
+    return as_statement(text).ending_balance
+
+# Main method to process the bank statement (scanned pages are OCR-ed unless ocr_fallback is False;
+# logo_match is a logo lookup already made for it, used if the text does not identify the bank)
+def process_bank_statement(pdf_path, name, address, ocr_fallback=True, logo_match=None):
+    with open_session(pdf_path, ocr=ocr_fallback) as session:
+        return check_statement(session, name, address, logo_match)
+
+# Function to run every check of process_bank_statement on an opened session
+def check_statement(session, name, address, logo_match=None):
+    # Pick the issuing bank's template from the first page, then parse the whole text with it in one pass
+    template = select_template(session, logo_match)
+    statement = parse_statement(extract_text(session), template)
     
     result = {
+        "bank": template.bank,
         "is_bank_statement": False,
         "statement_date": None,
         "is_within_last_6_months": False,
         "balance_tallies": False,
         "name_present": False,
-        "address_present": False
+        "address_present": False,
+        "name_score": 0.0,
+        "address_score": 0.0,
+        "offending_rows": []
     }
 
     # Check if the document is a bank statement
-    if is_bank_statement(ocr_text):
+    if statement.is_bank_statement:
         result["is_bank_statement"] = True
         
         # Extract statement date
-        statement_date = extract_statement_date(ocr_text)
-        if statement_date:
-            result["statement_date"] = statement_date
+        if statement.statement_date:
+            result["statement_date"] = statement.statement_date
             
             # Check if the statement date is within the last 6 months
-            result["is_within_last_6_months"] = is_within_last_6_months(statement_date)
+            result["is_within_last_6_months"] = is_within_last_6_months(statement.statement_date, template.date_formats)
+
+        # Verify the running balance row by row from the transaction table's layout
+        table = check_transaction_table(session, statement.starting_balance, statement.ending_balance, template)
+        if table["rows"] and table["opening_balance"] is not None:
+            result["balance_tallies"] = table["balance_tallies"]
+            result["offending_rows"] = [table["rows"][i] for i in table["offending_rows"]]
+        else:
+            # No table could be recovered: fall back to the totals of the signed amounts in the text
+            total_debits, total_credits, ending_balance = calculate_transactions(statement)
+
+            # Check if the balance tallies
+            result["balance_tallies"] = check_balance_tallies(statement.starting_balance, total_debits, total_credits, ending_balance)
+
+        # Check if the name and address are present in the document (one token index serves both)
+        index = TokenIndex().add(0, statement.text)
+        result["name_score"] = presence_score(statement, name, index)
+        result["address_score"] = presence_score(statement, address, index)
+        result["name_present"] = result["name_score"] >= DEFAULT_THRESHOLD
+        result["address_present"] = result["address_score"] >= DEFAULT_THRESHOLD
+
+    return result
+
+# Main method to process a long bank statement page by page, with memory that stays flat regardless of page count
+def process_bank_statement_streaming(pdf_path, name, address, classify_pages=2, ocr_fallback=True):
+    """
+    Streaming variant of process_bank_statement for statements with hundreds of pages.
+
+    Pages are read lazily and not memoized. The document is classified from its first
+    classify_pages pages and rejected right there if it is not a bank statement. Debit and
+    credit totals and the row-by-row running balance are kept incrementally, so only running
+    totals (and any offending rows) are held in memory. Rows are only buffered while the
+    opening balance is still unknown, and only for the first classify_pages pages; without
+    one by then, the table is skipped and the balance is checked from the signed amounts.
+    The name and address are scored as in process_bank_statement, page by page, with the end
+    of the previous page carried over so a phrase split by a page break is still found.
+    Pages without a text layer are OCR-ed unless ocr_fallback is False.
+
+    Returns:
+        dict: The same keys as process_bank_statement, plus "pages_read".
+    """
+    result = {
+        "bank": None,
+        "is_bank_statement": False,
+        "statement_date": None,
+        "is_within_last_6_months": False,
+        "balance_tallies": False,
+        "name_present": False,
+        "address_present": False,
+        "name_score": 0.0,
+        "address_score": 0.0,
+        "offending_rows": [],
+        "pages_read": 0
+    }
+
+    verifier = None
+    pending_rows = []  # Rows read before the opening balance is known
+    last_printed = None  # Last row with a printed balance, which the next page may still report
+    carried = ""  # End of the previous page's text, long enough to hold the name or address
+    carry_length = 2 * max(len(name), len(address)) + 64
+    name_score = address_score = 0.0
+
+    with open_session(pdf_path, ocr=ocr_fallback) as session:
+        template = select_template(session)
+        result["bank"] = template.bank
+        statement = StatementAccumulator(template=template)
+        table = TableExtractor(template)
+
+        for page_num in range(session.page_count):
+            page_text = session.page_text(page_num, cache=False)
+            statement.feed(page_text)
+            result["pages_read"] = page_num + 1
+
+            # Score the name and address on this page (the same exact-then-fuzzy match as the whole-text check)
+            text = f"{carried} {' '.join(page_text.split())}".strip()
+            name_score = max(name_score, presence_score(text, name))
+            address_score = max(address_score, presence_score(text, address))
+            carried = text[-carry_length:]
+
+            if table is None:
+                continue
+            rows = pending_rows + table.feed_page(session.words(page_num, cache=False), page_num)
+
+            # Reject the document as soon as its first pages show it is not a bank statement
+            if page_num + 1 >= classify_pages and not statement.is_bank_statement:
+                return result
+
+            if verifier is None:
+                opening_balance = table.opening_balance if table.opening_balance is not None else statement.starting_balance
+                if opening_balance is None:
+                    if page_num + 1 >= classify_pages:
+                        # No opening balance on the first pages: give up on the table rather than
+                        # hold every row, and fall back to the totals of the signed amounts
+                        table, pending_rows = None, []
+                    else:
+                        pending_rows = rows
+                    continue
+                verifier = RunningBalanceVerifier(opening_balance)
+                pending_rows = []
+
+            # Verify this page's rows and keep only the ones that do not tally; a row before this page
+            # can only be reported here as the last printed balance seen so far (an altered balance)
+            first_row, first_offending = verifier.row_count, len(verifier.offending_rows)
+            verifier.update(rows)
+            result["offending_rows"].extend(rows[index - first_row] if index >= first_row else last_printed
+                                            for index in verifier.offending_rows[first_offending:])
+            last_printed = next((row for row in reversed(rows) if row["balance"] is not None), last_printed)
 
-        # Extract the ending balance
-        ending_balance = extract_ending_balance(ocr_text)
-        # result["ending_balance"] = ending_balance
+    statement.finish()
+    if not statement.is_bank_statement:
+        return result
+    result["is_bank_statement"] = True
 
-        # Extract the starting balance
-        starting_balance = extract_starting_balance(ocr_text)
-        # result["starting_balance"] = starting_balance
+    # Extract statement date
+    if statement.statement_date:
+        result["statement_date"] = statement.statement_date
 
-        # Calculate the debits, credits, and ending balance
-        total_debits, total_credits, ending_balance = calculate_transactions(ocr_text)
+        # Check if the statement date is within the last 6 months
+        result["is_within_last_6_months"] = is_within_last_6_months(statement.statement_date, template.date_formats)
 
-        # Check if the balance tallies
-        result["balance_tallies"] = check_balance_tallies(starting_balance, total_debits, total_credits, ending_balance)
+    if verifier is not None and verifier.row_count:
+        ending_balance = table.ending_balance if table.ending_balance is not None else statement.ending_balance
+        table_result = verifier.result(ending_balance)
+        result["balance_tallies"] = table_result["balance_tallies"]
+        if len(table_result["offending_rows"]) > len(verifier.offending_rows):
+            result["offending_rows"].append(last_printed)  # The last balance was altered
+    elif statement.ending_balance is not None:
+        # No table could be recovered: fall back to the running totals of the signed amounts
+        result["balance_tallies"] = check_balance_tallies(statement.starting_balance, statement.total_debits, statement.total_credits, statement.ending_balance)
 
-        # Check if the name and address are present in the document
-        result["name_present"] = is_name_present(ocr_text, name)
-        result["address_present"] = is_address_present(ocr_text, address)
+    # Check if the name and address are present in the document
+    result["name_score"], result["address_score"] = name_score, address_score
+    result["name_present"] = result["name_score"] >= DEFAULT_THRESHOLD
+    result["address_present"] = result["address_score"] >= DEFAULT_THRESHOLD
 
     return result
 
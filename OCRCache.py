@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_VERSION = 1  # Bump whenever the OCR output format changes, so older entries are never read
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+
+# Function to build a cache key from image content plus every setting that changes the OCR output
+def content_key(data, **settings):
+    digest = hashlib.sha256()
+    if isinstance(data, np.ndarray):
+        digest.update(f"{data.shape}{data.dtype}".encode())
+        data = np.ascontiguousarray(data).data
+    digest.update(data)
+    digest.update(json.dumps({"version": CACHE_VERSION, **settings}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Cache of OCR results keyed by the content of the image and the preprocessing settings,
+    so a re-uploaded photo or statement is never OCR-ed twice.
+
+    Results live in an in-memory LRU tier and, if disk_dir is given, in an on-disk tier of
+    JSON files that survives restarts and is shared by worker processes. The disk tier evicts
+    the least recently used files once it grows past max_disk_bytes.
+
+    Parameters:
+        max_entries (int): Results kept in memory.
+        disk_dir (str): Folder for the on-disk tier (default is no disk tier).
+        max_disk_bytes (int): Size limit of the on-disk tier.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, disk_dir=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(disk_dir) if entry.name.endswith(".json"))
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return value
+
+        if self.disk_dir is not None:
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    value = json.load(file)
+                os.utime(path)  # The modification time orders the disk tier for eviction
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.counters["disk_hits"] += 1
+                self._remember(key, value)
+                return value
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.disk_dir is not None:
+            self._write(key, value)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.counters["memory_evictions"] += 1
+
+    def _write(self, key, value):
+        path = self._path(key)
+        # Write to a temporary file first so other workers never read a half-written entry
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(value, file)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._disk_bytes += size
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    # Function to delete the least recently used files until the disk tier is back under its limit
+    def _evict_disk(self):
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.disk_dir) if entry.name.endswith(".json")
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Already removed by another worker
+            total -= size
+            with self._lock:
+                self.counters["disk_evictions"] += 1
+
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters, memory_entries=len(self._memory), disk_bytes=self._disk_bytes)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+
+# The process-wide cache used by MainOCR and the OCR fallback
+_cache = OCRCache()
+_cache_lock = threading.Lock()
+
+
+def configure_ocr_cache(**options):
+    """
+    Replaces the process-wide OCR cache, e.g. to add a disk tier shared by batch workers.
+
+    Parameters:
+        **options: OCRCache options (max_entries, disk_dir, max_disk_bytes).
+
+    Returns:
+        OCRCache: The new cache.
+    """
+    global _cache
+    with _cache_lock:
+        _cache = OCRCache(**options)
+        return _cache
+
+
+# Function to get the process-wide OCR cache
+def get_ocr_cache():
+    return _cache
+
+
+# Example usage:
+# cache = configure_ocr_cache(disk_dir="ocr_cache", max_disk_bytes=256 * 1024 * 1024)
+# ... run OCR ...
+# print(cache.stats())
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from ImageTiles import tile_spans
+from OCRCache import content_key, get_ocr_cache
+from OCRReaderPool import get_reader_pool
+
+# Resolution scanned pages are rendered at for OCR (PDF pages are 72 points per inch)
+OCR_DPI = 300
+# Pages are OCR-ed in full-width horizontal strips, so a table row or word is never cut sideways
+STRIP_HEIGHT = 1280  # Strip height in pixels
+STRIP_OVERLAP = 160  # Pixels shared by neighbouring strips (a few text lines), so a line cut by one strip is whole in the other
+
+# A page needs OCR when it has almost no text but is mostly covered by images (a scan or photo)
+MIN_TEXT_CHARS = 20
+MIN_IMAGE_COVERAGE = 0.5
+
+
+# Function to decide whether a page lacks a usable text layer and should be OCR-ed
+def needs_ocr(page, text, min_chars=MIN_TEXT_CHARS, min_image_coverage=MIN_IMAGE_COVERAGE):
+    if len(text.strip()) >= min_chars:
+        return False
+
+    # Blank pages (or pages with only a few words) are not worth running OCR on
+    page_area = abs(page.rect)
+    image_area = sum(abs(page.rect & info["bbox"]) for info in page.get_image_info())
+    return page_area > 0 and image_area / page_area >= min_image_coverage
+
+
+# Function to convert a rendered page into a grayscale NumPy array
+def pixmap_to_gray(pix):
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    if pix.n == 1:
+        return img
+    return cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY if pix.n == 4 else cv2.COLOR_RGB2GRAY)
+
+
+# Function to split an image into overlapping full-width strips, as (tile box, core box) pairs; every
+# point of the image lies in exactly one core, so each detection is kept by exactly one strip, and a
+# line no taller than the overlap is whole in the strip that keeps it
+def tile_boxes(width, height, strip_height=STRIP_HEIGHT, overlap=STRIP_OVERLAP):
+    tiles = []
+    for y0, y1 in tile_spans(height, strip_height, overlap):
+        core = (
+            0,
+            y0 + overlap // 2 if y0 > 0 else 0,
+            width,
+            y1 - (overlap - overlap // 2) if y1 < height else height,
+        )
+        tiles.append(((0, y0, width, y1), core))
+    return tiles
+
+
+# Function to OCR one tile, returning (x0, y0, x1, y1, text, confidence) in image coordinates
+# for the detections whose center falls inside the tile's core
+def ocr_tile(image, tile, core, pool=None):
+    pool = pool or get_reader_pool()
+    x0, y0, x1, y1 = tile
+
+    detections = []
+    for points, text, confidence in pool.readtext(image[y0:y1, x0:x1], detail=1):
+        points = np.asarray(points, dtype=float)
+        left, top = points.min(axis=0) + (x0, y0)
+        right, bottom = points.max(axis=0) + (x0, y0)
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        if core[0] <= center_x < core[2] and core[1] <= center_y < core[3]:
+            detections.append((left, top, right, bottom, text, confidence))
+    return detections
+
+
+def ocr_image(image, strip_height=STRIP_HEIGHT, overlap=STRIP_OVERLAP, max_workers=None):
+    """
+    OCRs a large image (e.g. a page rendered at 300 DPI) in full-width strips, in parallel.
+
+    Parameters:
+        image (numpy.ndarray): Grayscale or BGR image.
+        strip_height (int): Strip height in pixels.
+        overlap (int): Pixels shared by neighbouring strips; at least the height of a text line.
+        max_workers (int): Number of strips OCR-ed at once (default is the reader pool's size).
+
+    Returns:
+        list: (x0, y0, x1, y1, text, confidence) of every detection, in image coordinates.
+    """
+    height, width = image.shape[:2]
+    tiles = tile_boxes(width, height, strip_height, overlap)
+    pool = get_reader_pool()
+
+    if len(tiles) == 1:
+        return ocr_tile(image, *tiles[0], pool)
+
+    # Each strip borrows its own reader from the pool, so strips are OCR-ed in parallel
+    with ThreadPoolExecutor(max_workers=max_workers or pool.size) as executor:
+        results = executor.map(lambda tile: ocr_tile(image, *tile, pool), tiles)
+        return [detection for detections in results for detection in detections]
+
+
+# Function to order detections into lines and convert them into page text and PyMuPDF-style
+# word boxes (x0, y0, x1, y1, word, block_no, line_no, word_no) in PDF points
+def detections_to_words(detections, scale=1.0, y_tolerance=0.5):
+    if not detections:
+        return "", []
+
+    detections = sorted(detections, key=lambda detection: (detection[1] + detection[3]) / 2)
+    tolerance = y_tolerance * max(float(np.median([bottom - top for _, top, _, bottom, _, _ in detections])), 1.0)
+
+    # A new line starts wherever the vertical gap between consecutive detection centers exceeds the tolerance
+    lines, previous_center = [], None
+    for detection in detections:
+        center = (detection[1] + detection[3]) / 2
+        if previous_center is None or center - previous_center > tolerance:
+            lines.append([])
+        lines[-1].append(detection)
+        previous_center = center
+
+    words, text_lines = [], []
+    for line_no, line in enumerate(lines):
+        line_words = []
+        for left, top, right, bottom, text, _ in sorted(line, key=lambda detection: detection[0]):
+            # EasyOCR returns phrases; spread the phrase's width over its words by character count
+            parts = text.split()
+            char_width = (right - left) / max(len(text), 1)
+            offset = 0
+            for part in parts:
+                start = text.index(part, offset)
+                offset = start + len(part)
+                line_words.append((
+                    (left + start * char_width) / scale, top / scale,
+                    (left + offset * char_width) / scale, bottom / scale,
+                    part, 0, line_no, len(line_words),
+                ))
+        words.extend(line_words)
+        text_lines.append(" ".join(word[4] for word in line_words))
+
+    return "\n".join(text_lines) + "\n", words
+
+
+# Function to OCR a rendered page into (text, words), with word boxes in PDF points; a page
+# rendered to the same pixels before (e.g. a re-uploaded statement) is served from the OCR cache
+def ocr_pixmap(pix, zoom, strip_height=STRIP_HEIGHT, overlap=STRIP_OVERLAP, max_workers=None):
+    key = content_key(
+        pix.samples_mv, task="page", size=(pix.width, pix.height, pix.n), zoom=zoom,
+        strip_height=strip_height, overlap=overlap, languages=get_reader_pool().languages,
+    )
+    cache = get_ocr_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached["text"], [tuple(word) for word in cached["words"]]
+
+    detections = ocr_image(pixmap_to_gray(pix), strip_height, overlap, max_workers)
+    text, words = detections_to_words(detections, zoom)
+    cache.put(key, {"text": text, "words": words})
+    return text, words
+
+
+# Example usage:
+# from DocumentSession import DocumentSession
+# with DocumentSession("scanned_statement.pdf", ocr=True) as session:
+#     print(session.text())
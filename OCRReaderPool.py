@@ -0,0 +1,178 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+DEFAULT_LANGUAGES = ("en",)
+TORCH_THREADS = 2  # Torch intra-op threads; one process-wide setting that every reader's inference uses
+
+
+# Function to pick a pool size that uses every core without oversubscribing them
+def default_pool_size(torch_threads=TORCH_THREADS):
+    return max(1, (os.cpu_count() or 1) // max(torch_threads, 1))
+
+
+class ReaderPool:
+    """
+    Pool of EasyOCR readers shared by every OCR caller in a process.
+
+    Readers are created lazily, only when a caller finds no idle reader and the pool is
+    below its size, so importing an OCR module costs nothing and a process that never
+    OCRs never loads the model. Each reader is used by one thread at a time; callers
+    beyond the pool size wait for a reader to be returned.
+
+    Torch's thread count belongs to the whole process, not to a reader, so the pool sets it
+    once, before its first reader is created; every reader then runs with torch_threads threads.
+
+    Parameters:
+        languages (tuple): EasyOCR language codes.
+        size (int): Maximum number of readers (default is the CPU count divided by torch_threads).
+        gpu (bool): Run on the GPU (default is False; the servers are CPU-only).
+        torch_threads (int): Process-wide torch thread count, so that size readers running at once
+            with torch_threads threads each use the cores once (None leaves torch's setting alone).
+        warm_up (bool): Run each new reader once on a blank image, so the first real call is not slowed
+            down by lazy initialization.
+        **reader_options: Extra options passed to easyocr.Reader (e.g. model_storage_directory).
+    """
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, size=None, gpu=False, torch_threads=TORCH_THREADS,
+                 warm_up=False, **reader_options):
+        self.languages = list(languages)
+        self.size = size or default_pool_size(torch_threads or 1)
+        self.gpu = gpu
+        self.torch_threads = torch_threads
+        self.warm_up = warm_up
+        self.reader_options = reader_options
+
+        self._idle = queue.LifoQueue()  # The most recently used reader is the warmest
+        self._created = 0
+        self._threads_set = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._created
+
+    def _create_reader(self):
+        import easyocr  # Loaded on first use, not when the pool is defined
+
+        with self._lock:
+            if not self._threads_set and not self.gpu and self.torch_threads:
+                import torch
+
+                torch.set_num_threads(self.torch_threads)  # Process-wide, so only once per pool
+            self._threads_set = True
+
+        reader = easyocr.Reader(self.languages, gpu=self.gpu, verbose=False, **self.reader_options)
+        if self.warm_up:
+            reader.readtext(np.full((32, 128), 255, dtype=np.uint8))
+        return reader
+
+    # Function to take a reader from the pool, creating one if none is idle and the pool is not full
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if not create:
+            return self._idle.get(timeout=timeout)
+
+        try:
+            return self._create_reader()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    # Function to return a reader to the pool
+    def release(self, reader):
+        self._idle.put(reader)
+
+    @contextmanager
+    def reader(self, timeout=None):
+        reader = self.acquire(timeout)
+        try:
+            yield reader
+        finally:
+            self.release(reader)
+
+    # Function to run readtext on a pooled reader
+    def readtext(self, image, **kwargs):
+        with self.reader() as reader:
+            return reader.readtext(image, **kwargs)
+
+    # Function to create readers up front (e.g. when a worker process starts), up to count readers
+    def prestart(self, count=None):
+        readers = [self.acquire() for _ in range(min(count or self.size, self.size))]
+        for reader in readers:
+            self.release(reader)
+        return self
+
+
+# The process-wide pool, and the process it was created in (a forked worker builds its own)
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def configure_reader_pool(**options):
+    """
+    Replaces the process-wide reader pool, e.g. to set its size from a worker count.
+    Call it before the first OCR call; readers of the previous pool are dropped.
+
+    Parameters:
+        **options: ReaderPool options (languages, size, gpu, torch_threads, warm_up, ...).
+
+    Returns:
+        ReaderPool: The new pool.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        _pool = ReaderPool(**options)
+        _pool_pid = os.getpid()
+        return _pool
+
+
+# Function to get the process-wide reader pool, created with the default options on first use
+def get_reader_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # Readers (and their torch state) are not shared with a forked child
+            options = {} if _pool is None else {
+                "languages": _pool.languages, "size": _pool.size, "gpu": _pool.gpu,
+                "torch_threads": _pool.torch_threads, "warm_up": _pool.warm_up, **_pool.reader_options,
+            }
+            _pool = ReaderPool(**options)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+class PooledReader:
+    """
+    Stand-in for a single easyocr.Reader: every method call runs on a reader borrowed from
+    the process-wide pool, so code written against one shared reader keeps working.
+    """
+
+    def __getattr__(self, name):
+        with get_reader_pool().reader() as reader:
+            attribute = getattr(reader, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with get_reader_pool().reader() as reader:
+                return getattr(reader, name)(*args, **kwargs)
+        return call
+
+
+# Example usage:
+# configure_reader_pool(size=4, warm_up=True)
+# print(get_reader_pool().readtext("NationalIC.png", detail=0))
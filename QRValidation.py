@@ -2,7 +2,10 @@ import cv2
 import fitz  # PyMuPDF
 import numpy as np
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
+from DocumentSession import open_session
 
 # List of official Malaysian bank domain names
 malaysian_banks_domains = [
@@ -22,18 +25,14 @@ malaysian_banks_domains = [
 
 # Function to extract an image from a specific PDF page
 def pdf_to_image(pdf_path, page_number=0, zoom_x=2.0, zoom_y=2.0):
-    doc = fitz.open(pdf_path)
-    page = doc.load_page(page_number)  # Load the specific page
+    with open_session(pdf_path) as session:
+        # Render the page (for better quality, at the given zoom factor)
+        pix = session.pixmap(page_number, zoom_x, zoom_y)  # Extract image as Pixmap object
 
-    # Set zoom factor (for better quality)
-    mat = fitz.Matrix(zoom_x, zoom_y)
-    pix = page.get_pixmap(matrix=mat)  # Extract image as Pixmap object
-
-    # Convert Pixmap to NumPy array (OpenCV compatible format)
-    img_data = np.frombuffer(pix.samples, dtype=np.uint8)
-    img = img_data.reshape(pix.height, pix.width, 3)
-    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)  # Convert to BGR for OpenCV
-    doc.close()
+        # Convert Pixmap to NumPy array (OpenCV compatible format)
+        img_data = np.frombuffer(pix.samples, dtype=np.uint8)
+        img = img_data.reshape(pix.height, pix.width, pix.n)
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)  # Convert to BGR for OpenCV
 
     return img
 
@@ -58,21 +57,203 @@ def get_domain_name(url):
     except Exception:
         return None
 
+# Function to check if a decoded QR value is a valid URL from an official Malaysian bank
+def is_bank_url(value):
+    if value and is_valid_url(value):
+        return get_domain_name(value) in malaysian_banks_domains
+    return False
+
+# Function to detect and decode every QR code in an image, as a list of (value, corner points)
+# (value is "" for a code that was found but could not be decoded at this resolution)
+def decode_qr_codes(image):
+    detector = cv2.QRCodeDetector()
+
+    found, values, points, _ = detector.detectAndDecodeMulti(image)
+    if found and points is not None:
+        return list(zip(values, points))
+
+    value, points, _ = detector.detectAndDecode(image)
+    if points is not None:
+        return [(value, points.reshape(-1, 2))]
+    return []
+
+# Function to render a page (or a clipped region of it) as a grayscale image for the QR detector
+def render_gray(session, page_number, zoom, clip=None, cache=True):
+    pix = session.pixmap(page_number, zoom, clip=clip, cache=cache)
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    if pix.n == 1:
+        return img[:, :, 0]
+    return cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY if pix.n == 4 else cv2.COLOR_RGB2GRAY)
+
+# Function to turn a code's corner points in a rendered image into a padded clip rectangle in PDF points
+def candidate_clip(points, zoom, origin, page_rect, padding=0.25):
+    x0, y0 = points.min(axis=0) / zoom
+    x1, y1 = points.max(axis=0) / zoom
+    pad_x, pad_y = (x1 - x0) * padding, (y1 - y0) * padding  # Keep the quiet zone around the code
+    clip = fitz.Rect(origin.x + x0 - pad_x, origin.y + y0 - pad_y, origin.x + x1 + pad_x, origin.y + y1 + pad_y)
+    return clip & page_rect
+
+# Function to decode an embedded image of the PDF straight into a grayscale array
+def embedded_image_gray(session, xref):
+    image_bytes = session.extract_image(xref)["image"]
+    img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is not None:
+        return img
+
+    # Formats OpenCV cannot decode (e.g. JPX, JBIG2): let PyMuPDF decode the pixels instead
+    with session.lock:
+        pix = fitz.Pixmap(session.doc, xref)
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)
+        if pix.n != 1:
+            pix = fitz.Pixmap(fitz.csGRAY, pix)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width).copy()
+
+def find_bank_qr_in_images(session, pages=None, min_size=21, min_decode_size=200, quiet_zone=0.1):
+    """
+    Looks for a bank QR code among the images embedded in the pages, without rendering them.
+    Each image is decoded from its own bytes, given a white quiet zone (embedded codes are
+    often cropped right at their edge) and upscaled when it is too small for the detector.
+
+    Returns:
+        str | None: The first decoded URL from an official Malaysian bank, or None.
+    """
+    if pages is None:
+        pages = range(session.page_count)
+
+    seen = set()
+    for page_number in pages:
+        for img in session.image_xrefs(page_number):
+            xref, width, height = img[0], img[2], img[3]
+            if xref in seen or min(width, height) < min_size:
+                continue  # Already tried, or too small to hold a QR code
+            seen.add(xref)
+
+            try:
+                gray = embedded_image_gray(session, xref)
+            except Exception:
+                continue
+
+            if min(gray.shape) < min_decode_size:
+                scale = int(np.ceil(min_decode_size / min(gray.shape)))
+                gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+            pad = int(max(gray.shape) * quiet_zone)
+            gray = cv2.copyMakeBorder(gray, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=255)
+
+            for value, _ in decode_qr_codes(gray):
+                if is_bank_url(value):
+                    return value
+    return None
+
+def scan_page_for_bank_qr(session, page_number, zooms=(1.0, 2.0, 4.0), full_page_max_zoom=2.0, stop_event=None):
+    """
+    Scans one page progressively: the whole page is rendered at the cheapest zoom first, and
+    regions where a code was detected but not decoded are re-rendered at higher zooms.
+    As long as no bank URL has been found, the whole page is also re-rendered at each higher
+    zoom up to full_page_max_zoom, so a small bank code next to a larger, non-bank code (which
+    already decodes at the cheapest zoom) is still found.
+
+    Returns:
+        str | None: The first decoded URL from an official Malaysian bank, or None.
+    """
+    page_rect = session.page(page_number).rect
+    regions = [None]  # None stands for the whole page
+
+    for zoom in zooms:
+        next_regions = []
+        for clip in regions:
+            if stop_event is not None and stop_event.is_set():
+                return None  # Another page already found a valid code
+            if clip is None and zoom > full_page_max_zoom:
+                continue
+
+            # Renders are not kept in the session: nothing reads them again, and a long statement
+            # would otherwise hold one per page for as long as the session is open
+            image = render_gray(session, page_number, zoom, clip, cache=False)
+            origin = page_rect.tl if clip is None else clip.tl
+
+            codes = decode_qr_codes(image)
+            for value, points in codes:
+                if is_bank_url(value):
+                    return value
+                if not value:
+                    next_regions.append(candidate_clip(points, zoom, origin, page_rect))
+
+            if clip is None:
+                next_regions.append(None)  # No bank code on the page yet, try the whole page at the next zoom
+
+        regions = next_regions
+        if not regions:
+            break
+    return None
+
+def find_bank_qr_code(pdf_path, pages=None, zooms=(1.0, 2.0, 4.0), full_page_max_zoom=2.0, max_workers=None):
+    """
+    Scans the pages of a PDF for a QR code linking to an official Malaysian bank. The embedded
+    images are tried first; only if none of them holds a bank code are the pages rendered and
+    scanned in parallel, stopping as soon as one page finds it.
+
+    Parameters:
+        pdf_path (str | DocumentSession): Path to the input PDF file, or a shared document session.
+        pages (list): Page numbers to scan (default is every page).
+        zooms (tuple): Render zooms to escalate through, cheapest first.
+        full_page_max_zoom (float): Highest zoom at which a whole page is rendered.
+        max_workers (int): Number of pages scanned at the same time.
+
+    Returns:
+        str | None: The URL of the first valid bank QR code found, or None.
+    """
+    with open_session(pdf_path) as session:
+        if pages is None:
+            pages = range(session.page_count)
+
+        # Most statements embed the QR code as its own image: try those before rendering any page
+        value = find_bank_qr_in_images(session, pages)
+        if value:
+            return value
+
+        stop_event = threading.Event()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(scan_page_for_bank_qr, session, page_number, zooms, full_page_max_zoom, stop_event)
+                for page_number in pages
+            ]
+            for future in as_completed(futures):
+                value = future.result()
+                if value:
+                    stop_event.set()
+                    for pending in futures:
+                        pending.cancel()
+                    return value
+    return None
+
 # Method to check if QR code contains a valid URL and if it's from an official Malaysian bank
-def check_qr_code_for_bank(pdf_path, page_number=0):
+def check_qr_code_for_bank(pdf_path, page_number=0, progressive=False):
     """
     Checks if the QR code extracted from a PDF contains a valid URL from an official Malaysian bank.
 
     Parameters:
-        pdf_path (str): Path to the input PDF file.
+        pdf_path (str | DocumentSession): Path to the input PDF file, or a shared document session.
         page_number (int): Page number to extract the QR code from (default is 0).
+            With progressive scanning, None scans every page.
+        progressive (bool): Scan with escalating resolution and several codes per page
+            (see find_bank_qr_code) instead of a single render at 2x zoom.
 
     Returns:
         bool: True if the QR code contains a valid URL from an official Malaysian bank, False otherwise.
     """
     try:
-        # Load the PDF and convert the specified page to an image
-        image = pdf_to_image(pdf_path, page_number)
+        if progressive:
+            pages = None if page_number is None else [page_number]
+            return find_bank_qr_code(pdf_path, pages) is not None
+
+        with open_session(pdf_path) as session:
+            # Try the QR code images embedded in the page first
+            if find_bank_qr_in_images(session, [page_number]):
+                return True
+
+            # Load the PDF and convert the specified page to an image
+            image = pdf_to_image(session, page_number)
 
         # Create a QRCodeDetector object
         detector = cv2.QRCodeDetector()
@@ -81,10 +262,8 @@ def check_qr_code_for_bank(pdf_path, page_number=0):
         value, pts, qr_code = detector.detectAndDecode(image)
 
         # Check if QR code contains valid data and if the URL is valid
-        if value and is_valid_url(value):
-            domain = get_domain_name(value)
-            if domain in malaysian_banks_domains:
-                return True  # QR code contains a valid URL from an official Malaysian bank
+        if is_bank_url(value):
+            return True  # QR code contains a valid URL from an official Malaysian bank
         return False  # Either no QR code, invalid URL, or not a bank URL
 
     except Exception:
@@ -92,6 +271,7 @@ def check_qr_code_for_bank(pdf_path, page_number=0):
 
 # Example usage:
 # result = check_qr_code_for_bank("BankStatementQR.pdf", page_number=0)
+# result = check_qr_code_for_bank("BankStatementQR.pdf", page_number=None, progressive=True)  # Every page
 
 # # Print the result
 # print(result)
@@ -0,0 +1,214 @@
+import re
+from dataclasses import dataclass, field
+
+# Expressions for the tokens the balance check needs; each keeps the exact expression the
+# individual checks used to run on their own. Bank templates can replace any of them.
+DEFAULT_PATTERNS = {
+    "statement_date": r"STATEMENT DATE\s*[:\-\s]*(?P<date>[0-9]{2}/[0-9]{2}/[0-9]{2,4})",
+    "ending_balance": r"ENDING BALANCE\s*[:\-\s]*(?P<ending_amount>[\d,]+\.\d{2})",
+    "starting_balance": r"(?P<starting_amount>\d+\.\d+)\s+\d{2}/\d{2}/\d{2}",
+    "transaction": r"(?P<amount>\d+\.\d+)(?P<sign>[+-])",
+}
+
+# Keywords that must all appear for a document to count as a bank statement
+DEFAULT_KEYWORDS = {
+    "statement_balance": r"(?i:STATEMENT BALANCE)",
+    "savings_account": r"(?i:SAVINGS ACCOUNT)",
+}
+
+
+# Function to combine the token expressions into one pattern, so the statement text is scanned once.
+# Each alternative is a lookahead that consumes nothing, so a token never hides a token of another
+# kind that overlaps it (e.g. "ENDING BALANCE 12.34-" is both the ending balance and a debit)
+def build_token_pattern(patterns, keywords):
+    alternatives = [
+        ("statement_date", patterns["statement_date"]),
+        ("ending_balance", patterns["ending_balance"]),
+        *keywords.items(),
+        ("starting_balance", patterns["starting_balance"]),
+        ("transaction", patterns["transaction"]),
+    ]
+    return re.compile("|".join(f"(?=(?P<{name}>{expression}))" for name, expression in alternatives))
+
+
+# Function to yield (kind, match) for every token in the text, in order. Tokens of one kind never
+# overlap each other, so each kind is found exactly as if its expression had run on its own with
+# finditer; the token's text is match.group(kind), from match.start() to match.end(kind)
+def iter_tokens(token_pattern, text, start=0):
+    kind_ends = {}
+    for match in token_pattern.finditer(text, start):
+        kind = match.lastgroup  # The outermost group of the alternative that matched
+        if match.start() < kind_ends.get(kind, 0):
+            continue  # Inside the previous token of the same kind
+        kind_ends[kind] = match.end(kind)
+        yield kind, match
+
+
+TOKEN_PATTERN = build_token_pattern(DEFAULT_PATTERNS, DEFAULT_KEYWORDS)
+REQUIRED_KEYWORDS = tuple(DEFAULT_KEYWORDS)
+
+
+@dataclass
+class Transaction:
+    amount: float
+    sign: str  # "+" for a credit (money coming in), "-" for a debit (money going out)
+    position: int  # Offset of the amount in the statement text
+
+    @property
+    def signed_amount(self):
+        return self.amount if self.sign == "+" else -self.amount
+
+
+@dataclass
+class Statement:
+    text: str
+    found_keywords: dict = field(default_factory=dict)  # Bank statement keyword -> True once seen
+    statement_date: str = None
+    starting_balance: float = None
+    ending_balance: float = None
+    transactions: list = field(default_factory=list)
+    required_keywords: tuple = REQUIRED_KEYWORDS
+
+    @property
+    def is_bank_statement(self):
+        return all(self.found_keywords.get(keyword) for keyword in self.required_keywords)
+
+    @property
+    def total_debits(self):
+        return sum(t.amount for t in self.transactions if t.sign == "-")
+
+    @property
+    def total_credits(self):
+        return sum(t.amount for t in self.transactions if t.sign == "+")
+
+
+def parse_statement(text, template=None):
+    """
+    Parses bank statement text in a single tokenizer pass into a Statement.
+
+    The first statement date, starting balance and ending balance found are kept, every
+    signed amount (e.g. "10.10-" or "19.08+") becomes a transaction, and found_keywords records
+    which of the bank statement keywords were seen. Every kind of token is found exactly as
+    if its expression were searched on its own, even where tokens of different kinds overlap.
+
+    Parameters:
+        text (str): Statement text, with whitespace already collapsed.
+        template (StatementTemplate): Bank template whose patterns to use (default is the built-in patterns).
+
+    Returns:
+        Statement: The parsed statement.
+    """
+    token_pattern = template.token_pattern if template is not None else TOKEN_PATTERN
+    statement = Statement(text=text)
+    if template is not None:
+        statement.required_keywords = template.required_keywords
+
+    for kind, match in iter_tokens(token_pattern, text):
+        if kind == "transaction":
+            statement.transactions.append(Transaction(float(match.group("amount")), match.group("sign"), match.start()))
+        elif kind == "statement_date":
+            if statement.statement_date is None:
+                statement.statement_date = match.group("date")
+        elif kind == "ending_balance":
+            if statement.ending_balance is None:
+                statement.ending_balance = float(match.group("ending_amount").replace(",", ""))
+        elif kind == "starting_balance":
+            if statement.starting_balance is None:
+                statement.starting_balance = float(match.group("starting_amount"))
+        else:
+            statement.found_keywords[kind] = True  # Bank statement keywords, e.g. statement_balance / savings_account
+
+    return statement
+
+
+
+class StatementAccumulator:
+    """
+    Parses a statement incrementally, one page of text at a time, keeping only running
+    totals instead of the text and the list of transactions, so memory stays flat no
+    matter how many pages the statement has.
+
+    The last `overlap` characters of each page are held back and parsed together with the
+    next page, so tokens and phrases split across a page break are still found.
+
+    Parameters:
+        phrases (dict): Phrases to look for while streaming, e.g. {"name": ..., "address": ...};
+            found_phrases records which ones appeared (case insensitive).
+        overlap (int): Characters carried over between pages.
+        template (StatementTemplate): Bank template whose patterns to use (default is the built-in patterns).
+    """
+
+    def __init__(self, phrases=None, overlap=256, template=None):
+        self.token_pattern = template.token_pattern if template is not None else TOKEN_PATTERN
+        self.required_keywords = template.required_keywords if template is not None else REQUIRED_KEYWORDS
+        self.found_keywords = {}
+        self.statement_date = None
+        self.starting_balance = None
+        self.ending_balance = None
+        self.total_debits = 0
+        self.total_credits = 0
+        self.transaction_count = 0
+        self.page_count = 0
+
+        self.phrases = {key: re.compile(re.escape(phrase), re.IGNORECASE) for key, phrase in (phrases or {}).items()}
+        self.found_phrases = {key: False for key in self.phrases}
+        self.overlap = max(overlap, *(len(pattern.pattern) for pattern in self.phrases.values())) if self.phrases else overlap
+        self._carry = ""
+
+    @property
+    def is_bank_statement(self):
+        return all(self.found_keywords.get(keyword) for keyword in self.required_keywords)
+
+    # Function to parse the next page of text
+    def feed(self, page_text):
+        page_text = " ".join(page_text.split())  # Same whitespace collapsing as extract_text
+        buffer = f"{self._carry} {page_text}" if self._carry else page_text
+        self.page_count += 1
+        self._consume(buffer, final=False)
+
+    # Function to parse whatever is still held back once the last page has been fed
+    def finish(self):
+        if self._carry:
+            self._consume(self._carry, final=True)
+        return self
+
+    def _consume(self, buffer, final):
+        for key, pattern in self.phrases.items():
+            if not self.found_phrases[key] and pattern.search(buffer):
+                self.found_phrases[key] = True
+
+        # Tokens ending inside the held back tail are parsed with the next page instead
+        cut = len(buffer) if final else max(0, len(buffer) - self.overlap)
+        for kind, match in iter_tokens(self.token_pattern, buffer):
+            if match.end(kind) > cut:
+                cut = match.start()
+                break
+            self._add_token(kind, match)
+
+        # Keywords only mark presence, so those in the held back tail can be counted now; a short
+        # page (e.g. a scanned one) is then classified without waiting for the next page
+        for kind, _ in iter_tokens(self.token_pattern, buffer, cut):
+            if kind in self.required_keywords:
+                self.found_keywords[kind] = True
+
+        self._carry = "" if final else buffer[cut:]
+
+    def _add_token(self, kind, match):
+        if kind == "transaction":
+            amount = float(match.group("amount"))
+            if match.group("sign") == "-":
+                self.total_debits += amount
+            else:
+                self.total_credits += amount
+            self.transaction_count += 1
+        elif kind == "statement_date":
+            if self.statement_date is None:
+                self.statement_date = match.group("date")
+        elif kind == "ending_balance":
+            if self.ending_balance is None:
+                self.ending_balance = float(match.group("ending_amount").replace(",", ""))
+        elif kind == "starting_balance":
+            if self.starting_balance is None:
+                self.starting_balance = float(match.group("starting_amount"))
+        else:
+            self.found_keywords[kind] = True
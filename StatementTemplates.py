@@ -0,0 +1,185 @@
+import re
+from dataclasses import dataclass, field
+
+from DocumentSession import open_session
+from StatementParser import DEFAULT_KEYWORDS, DEFAULT_PATTERNS, build_token_pattern
+from TransactionTable import COLUMN_KEYWORDS, ENDING_KEYWORDS, OPENING_KEYWORDS
+
+# Date formats tried, in order, when reading a statement date
+DEFAULT_DATE_FORMATS = ("%d/%m/%y", "%d/%m/%Y")
+
+# Points given to each kind of fingerprint evidence when picking a template
+PRODUCER_SCORE = 3
+HEADER_KEYWORD_SCORE = 1
+
+
+@dataclass
+class StatementTemplate:
+    """
+    Layout of one bank's statements: what identifies them, and how to parse them.
+
+    Parameters:
+        bank (str): Bank name; matches the logo file name in the official logo folder (e.g. "maybank").
+            None for the default template, used when the bank is not identified.
+        domain (str): The bank's web domain, as listed in QRValidation.malaysian_banks_domains.
+        producers (tuple): Substrings of the PDF producer/creator metadata written by the bank's systems.
+        header_keywords (tuple): Words printed in the first page's header (bank name, domain, ...).
+        patterns (dict): Token expressions, as in StatementParser.DEFAULT_PATTERNS.
+        keywords (dict): Keywords that must all appear for the document to be a statement.
+        column_keywords (dict): Header words of each transaction table column.
+        opening_keywords (tuple): Labels of the opening balance row.
+        ending_keywords (tuple): Labels of the ending balance row.
+        date_formats (tuple): strptime formats of the statement date.
+    """
+    bank: str
+    domain: str = None
+    producers: tuple = ()
+    header_keywords: tuple = ()
+    patterns: dict = field(default_factory=lambda: dict(DEFAULT_PATTERNS))
+    keywords: dict = field(default_factory=lambda: dict(DEFAULT_KEYWORDS))
+    column_keywords: dict = field(default_factory=lambda: dict(COLUMN_KEYWORDS))
+    opening_keywords: tuple = OPENING_KEYWORDS
+    ending_keywords: tuple = ENDING_KEYWORDS
+    date_formats: tuple = DEFAULT_DATE_FORMATS
+
+    def __post_init__(self):
+        # Compiled once when the template is defined, never per document
+        self.token_pattern = build_token_pattern(self.patterns, self.keywords)
+        self.required_keywords = tuple(self.keywords)
+        self.header_keywords = tuple(keyword.upper() for keyword in self.header_keywords)
+        if self.domain and self.domain.upper() not in self.header_keywords:
+            self.header_keywords += (self.domain.upper(),)
+
+
+# Registered templates, by bank name, and the template of statements from an unidentified bank
+TEMPLATES = {}
+DEFAULT_TEMPLATE = StatementTemplate(bank=None)
+
+# Combined expressions over every template, rebuilt whenever a template is registered
+_header_pattern = None
+_producer_pattern = None
+_group_banks = {}
+
+
+# Function to add (or replace) a bank's template in the registry
+def register_template(template):
+    global _header_pattern, _producer_pattern
+
+    TEMPLATES[template.bank] = template
+
+    # One alternation per kind of evidence, with a named group per bank, so a page is
+    # scanned once for all banks instead of once per template
+    _group_banks.clear()
+    header_alternatives, producer_alternatives = [], []
+    for index, registered in enumerate(TEMPLATES.values()):
+        group = f"t{index}"
+        _group_banks[group] = registered.bank
+        if registered.header_keywords:
+            keywords = sorted(registered.header_keywords, key=len, reverse=True)
+            header_alternatives.append(f"(?P<{group}>{'|'.join(re.escape(keyword) for keyword in keywords)})")
+        if registered.producers:
+            producer_alternatives.append(f"(?P<{group}>{'|'.join(re.escape(producer) for producer in registered.producers)})")
+
+    _header_pattern = re.compile(r"\b(?:" + "|".join(header_alternatives) + r")\b") if header_alternatives else None
+    _producer_pattern = re.compile("|".join(producer_alternatives), re.IGNORECASE) if producer_alternatives else None
+    return template
+
+
+# Function to get a bank's template, falling back to the default template
+def get_template(bank=None):
+    return TEMPLATES.get(bank) or DEFAULT_TEMPLATE
+
+
+def fingerprint(pdf_path):
+    """
+    Scores every registered bank against the cheap features of a statement: the PDF's
+    producer/creator metadata and the keywords in the first page's text. Both are matched
+    with one combined expression each, whatever the number of templates.
+
+    Parameters:
+        pdf_path (str | DocumentSession): Path to the input PDF file, or a shared document session.
+
+    Returns:
+        dict: {bank: score} for the banks with any evidence.
+    """
+    scores = {}
+
+    with open_session(pdf_path) as session:
+        metadata = session.metadata or {}
+        first_page = session.page_text(0).upper() if session.page_count else ""
+
+    producer = " ".join(filter(None, (metadata.get("producer"), metadata.get("creator"))))
+    if _producer_pattern is not None and producer:
+        for match in _producer_pattern.finditer(producer):
+            bank = _group_banks[match.lastgroup]
+            scores[bank] = scores.get(bank, 0) + PRODUCER_SCORE
+
+    if _header_pattern is not None:
+        # Each distinct keyword counts once, so a bank name repeated in every row does not dominate
+        seen = set()
+        for match in _header_pattern.finditer(first_page):
+            bank = _group_banks[match.lastgroup]
+            if (bank, match.group()) not in seen:
+                seen.add((bank, match.group()))
+                scores[bank] = scores.get(bank, 0) + HEADER_KEYWORD_SCORE
+
+    return scores
+
+
+def select_template(pdf_path, logo_match=None):
+    """
+    Picks the template of the bank that issued a statement, before it is parsed.
+
+    Only the cheap fingerprint is computed here (see fingerprint). When it gives no single best
+    bank, a logo match the caller already has (e.g. from BankLogoValidity.identify_bank) settles
+    it; the logo is never looked up here, since that decodes images and renders the header.
+
+    Parameters:
+        pdf_path (str | DocumentSession): Path to the input PDF file, or a shared document session.
+        logo_match (dict): Result of a logo lookup already made for this statement, if any.
+
+    Returns:
+        StatementTemplate: The best matching template, or the default template (bank None) when
+            nothing identifies the bank.
+    """
+    scores = fingerprint(pdf_path)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    if ranked and (len(ranked) == 1 or ranked[0][1] > ranked[1][1]):
+        return TEMPLATES[ranked[0][0]]
+
+    if logo_match is not None and logo_match.get("bank") in TEMPLATES:
+        return TEMPLATES[logo_match["bank"]]
+
+    # Ties are settled in favour of the first bank with the top score
+    return TEMPLATES[ranked[0][0]] if ranked else get_template()
+
+
+# Maybank is the layout the balance check was written for; its template keeps those exact patterns,
+# which are also the default template's
+register_template(StatementTemplate(
+    bank="maybank",
+    domain="maybank2u.com.my",
+    producers=("Maybank",),
+    header_keywords=("MAYBANK", "MALAYAN BANKING BERHAD", "MAYBANK ISLAMIC"),
+))
+
+# The other banks whose QR codes are accepted; until their layouts are added they are
+# identified (so the result names the right bank) and parsed with the default patterns
+for bank, domain, header_keywords in (
+    ("cimb", "cimb.com.my", ("CIMB BANK", "CIMB ISLAMIC")),
+    ("rhb", "rhbgroup.com", ("RHB BANK", "RHB ISLAMIC")),
+    ("publicbank", "publicbank.com.my", ("PUBLIC BANK", "PUBLIC ISLAMIC BANK")),
+    ("bankislam", "bankislam.com.my", ("BANK ISLAM MALAYSIA",)),
+    ("ambank", "ambankgroup.com.my", ("AMBANK", "AMBANK ISLAMIC")),
+    ("hongleong", "hongleong.com.my", ("HONG LEONG BANK", "HONG LEONG ISLAMIC BANK")),
+    ("uob", "uob.com.my", ("UNITED OVERSEAS BANK", "UOB MALAYSIA")),
+    ("bsn", "bsn.com.my", ("BANK SIMPANAN NASIONAL",)),
+    ("bankrakyat", "bankrakyat.com.my", ("BANK RAKYAT", "BANK KERJASAMA RAKYAT")),
+    ("muamalat", "bankmuhammadiah.com.my", ("BANK MUAMALAT",)),
+    ("kfh", "kfh.com.my", ("KUWAIT FINANCE HOUSE",)),
+):
+    register_template(StatementTemplate(bank=bank, domain=domain, header_keywords=header_keywords))
+
+# Example usage:
+# template = select_template("bankstatement.pdf")
+# print(template.bank)
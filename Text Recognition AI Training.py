@@ -1,17 +1,16 @@
-import tensorflow as tf
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
-df=pd.read_csv("A_Z Handwritten Data.csv")
-alphabets = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-data_array = np.array(df,dtype=np.uint8)
+from HandwritingDataset import load_dataset, make_dataset, split_indices
+from HandwritingModels import COMPACT_MODEL_PATH, build_model, evaluate_model, keras_device, measure_latency, print_report
+
+# "standard" for the original network, or "compact" for the smaller, faster network meant for CPU serving
+MODEL_VARIANT = "standard"
+MODEL_PATH = 'handwritten_alphabet_model.h5' if MODEL_VARIANT == "standard" else COMPACT_MODEL_PATH
 
-labels = data_array[:,0]
-#print(len(labels))
-x = data_array[:,1:].reshape(372450,28,28)/255.
-# print((data_array[:,1:]).shape)
-#del data_array
+# The CSV is converted once to memory-mapped uint8 arrays; later runs open them without parsing anything
+x, labels = load_dataset("A_Z Handwritten Data.csv")
+alphabets = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
 unique, counts = np.unique(labels, return_counts=True)
 alphabets_list = list(zip(alphabets, counts))
 # for i in alphabets_list:
@@ -24,7 +23,7 @@ alphabets_list = list(zip(alphabets, counts))
 # plt.show()
 
 
-a=np.random.randint(low=0,high=372449,size=400)
+a=np.random.randint(low=0,high=len(x),size=400)
 fig=plt.figure(figsize=(30,30))
 c=1
 for i in a:
@@ -35,52 +34,36 @@ del a
 
 del c, alphabets_list, counts, unique #deleting further not required variables due to memory issues 
 
-from sklearn.model_selection import train_test_split as train_test_split
+train_index,validation_index,test_index = split_indices(len(x),test_fraction=0.01,validation_fraction=0.1)
+train_data = make_dataset(x,labels,train_index,batch_size=256)
+validation_data = make_dataset(x,labels,validation_index,batch_size=1024,shuffle=False)
+x_test,y_test = x[np.sort(test_index)],labels[np.sort(test_index)]
+# print(len(train_index), len(validation_index), len(test_index))
 
-#x=x.reshape(372450,28,28,1)
-x_train,x_test,y_train,y_test = train_test_split(x,labels,test_size=0.01)
-# print(x_train.shape, x_test.shape, y_train.shape, y_test.shape)
 
-
-from keras.models import Sequential
-from keras.layers import Conv2D
-from keras.layers import MaxPooling2D
-from keras.layers import Dense,Dropout
-from keras.layers import Flatten
-from keras.layers import BatchNormalization
-from tensorflow.keras.optimizers import Adadelta
 from tensorflow.keras.optimizers import SGD
-from tensorflow.keras.models import load_model
-
-nn_model = Sequential([Conv2D(128,(3,3),activation='relu', kernel_initializer='he_uniform', input_shape=(28, 28, 1),padding='same'),
-                    Conv2D(64,(3,3),activation='relu', kernel_initializer='he_uniform',padding='same'),
-                    MaxPooling2D(2,2),
-                    Conv2D(64,(3,3),activation='relu', kernel_initializer='he_uniform',padding='same'),
-                    Conv2D(64,(3,3),activation='relu', kernel_initializer='he_uniform',padding='same'),
-                    BatchNormalization(),
-                    MaxPooling2D(2,2),
-                    Flatten(),
-                    Dense(100,activation='relu',kernel_initializer='he_uniform'),
-                    Dropout(0.1),
-                    Dense(64,activation='relu',kernel_initializer='he_uniform'),
-                    Dropout(0.125),
-                    BatchNormalization(),
-                    Dense(26,activation='softmax')])
+
+nn_model = build_model(MODEL_VARIANT)
 nn_model.compile(loss='sparse_categorical_crossentropy', optimizer=SGD(lr=0.01, momentum=0.9),metrics=['accuracy'])
 nn_model.summary()
 
-nn_model_fit = nn_model.fit(x=x_train,y=y_train,validation_split=0.1,epochs=1)
-nn_model.save('handwritten_alphabet_model.h5')
+nn_model_fit = nn_model.fit(train_data,validation_data=validation_data,epochs=1)
+nn_model.save(MODEL_PATH)
 print("Model saved successfully!")
 
-# nn_model = load_model('handwritten_alphabet_model.h5')
+# from tensorflow.keras.models import load_model
+# nn_model = load_model(MODEL_PATH)
+
+# Accuracy, confusion matrix and throughput over the whole test split, plus latency per call on the
+# device the model was trained on (use HandwritingModels.py --cpu for CPU serving latency)
+evaluation = evaluate_model(nn_model.predict_on_batch, x_test, y_test)
+print_report(evaluation, measure_latency(nn_model.predict_on_batch), keras_device())
 
 def test_images(n=225):
-    index=np.random.randint(low=0,high=3720,size=n)
+    index=np.random.randint(low=0,high=len(x_test),size=n)
     fig=plt.figure(figsize=(30,40))
     for i in range(n):
-        [pred]=nn_model.predict(x_test[index[i]].reshape(1,28,28,1))
-        pred=np.argmax(pred)
+        pred=evaluation["predictions"][index[i]]
         actual=y_test[index[i]]
         fig.add_subplot(15,15,i+1)
         plt.xticks([])
@@ -0,0 +1,338 @@
+import re
+
+import numpy as np
+
+from DocumentSession import open_session
+
+DATE_PATTERN = re.compile(r"^\d{2}/\d{2}(?:/\d{2,4})?$")
+AMOUNT_PATTERN = re.compile(r"^([\d,]+\.\d{2})([+-]|DR|CR)?$", re.IGNORECASE)
+
+# Header words that name each column of the transaction table; a table has either one signed
+# amount column or separate debit and credit columns
+COLUMN_KEYWORDS = {
+    "date": ("DATE", "TARIKH"),
+    "description": ("DESCRIPTION", "BUTIRAN"),
+    "amount": ("AMOUNT", "JUMLAH"),
+    "debit": ("DEBIT", "WITHDRAWAL", "PENGELUARAN"),
+    "credit": ("CREDIT", "KREDIT", "DEPOSIT"),
+    "balance": ("BALANCE", "BAKI"),
+}
+AMOUNT_COLUMNS = ("amount", "debit", "credit")
+OPENING_KEYWORDS = ("BEGINNING BALANCE", "OPENING BALANCE", "BALANCE B/F", "BALANCE BROUGHT FORWARD")
+ENDING_KEYWORDS = ("ENDING BALANCE", "CLOSING BALANCE")
+
+# Tolerance in cents when comparing balances
+TOLERANCE_CENTS = 1
+
+
+# Function to parse an amount token such as "1,234.56-" into (value, sign); sign is None if unsigned
+def parse_amount(token):
+    match = AMOUNT_PATTERN.match(token)
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    sign = (match.group(2) or "").upper()
+    if sign in ("-", "DR"):
+        return value, "-"
+    if sign in ("+", "CR"):
+        return value, "+"
+    return value, None
+
+
+# Function to group a page's word boxes into rows of words, top to bottom and left to right
+def group_rows(words, y_tolerance=0.5):
+    if not words:
+        return []
+
+    boxes = np.array([word[:4] for word in words], dtype=float)
+    centers = (boxes[:, 1] + boxes[:, 3]) / 2
+    heights = boxes[:, 3] - boxes[:, 1]
+    tolerance = y_tolerance * max(float(np.median(heights)), 1.0)
+
+    # A new row starts wherever the vertical gap between consecutive word centers exceeds the tolerance
+    order = np.argsort(centers, kind="stable")
+    row_ids = np.concatenate(([0], np.cumsum(np.diff(centers[order]) > tolerance)))
+
+    rows = [[] for _ in range(row_ids[-1] + 1)]
+    for row_id, word_index in zip(row_ids, order):
+        rows[row_id].append(words[word_index])
+    return [sorted(row, key=lambda word: word[0]) for row in rows]
+
+
+# Function to find the column anchors (x centers of the header words) in a header row
+def find_header(row, column_keywords=COLUMN_KEYWORDS):
+    anchors = {}
+    for word in row:
+        token = word[4].upper().strip(":")
+        for column, keywords in column_keywords.items():
+            if token in keywords and column not in anchors:
+                anchors[column] = (word[0] + word[2]) / 2
+    if "date" in anchors and "balance" in anchors:
+        return anchors
+    return None
+
+
+# Function to split a table row into date, description, amount and balance. The amount is negative
+# for a debit: from its column (debit/credit tables) or its sign ("-", "DR"). An amount with neither
+# is kept positive with amount_signed False, and its direction is taken from the balance later
+def parse_row(row, anchors):
+    date = row[0][4] if DATE_PATTERN.match(row[0][4]) else None
+    description = []
+    amount = balance = None
+    amount_signed = True
+    numbers = []
+
+    for word in row[1 if date else 0:]:
+        parsed = parse_amount(word[4])
+        if parsed is None:
+            description.append(word[4])
+        else:
+            numbers.append((word, parsed))
+
+    columns = [name for name in (*AMOUNT_COLUMNS, "balance") if anchors and name in anchors]
+    for word, (value, sign) in numbers:
+        if len(columns) > 1:
+            # Assign the number to whichever amount/balance column it sits closest to
+            center = (word[0] + word[2]) / 2
+            column = min(columns, key=lambda name: abs(anchors[name] - center))
+        else:
+            # Without a header, a signed number is the amount and the rightmost number the balance
+            column = "amount" if sign else "balance"
+
+        if column == "debit":
+            amount = -value
+        elif column == "credit":
+            amount = value
+        elif column == "amount":
+            amount = -value if sign == "-" else value
+            amount_signed = sign is not None
+        else:
+            balance = value
+
+    return {"date": date, "description": " ".join(description), "amount": amount, "balance": balance,
+            "amount_signed": amount_signed}
+
+
+class TableExtractor:
+    """
+    Recovers the transaction table of a statement from the PDF's word coordinates, one page
+    at a time, carrying the opening/ending balance and the last row across pages.
+
+    Words are grouped into rows by their vertical position; the header row (DATE ... BALANCE)
+    gives the column positions, rows starting with a date are transactions, and rows without
+    a date continue the previous transaction's description.
+
+    Parameters:
+        template (StatementTemplate): Bank template with the column, opening and ending balance
+            keywords to look for (default is the built-in keywords).
+    """
+
+    def __init__(self, template=None):
+        self.column_keywords = template.column_keywords if template is not None else COLUMN_KEYWORDS
+        self.opening_keywords = template.opening_keywords if template is not None else OPENING_KEYWORDS
+        self.ending_keywords = template.ending_keywords if template is not None else ENDING_KEYWORDS
+        self.opening_balance = None
+        self.ending_balance = None
+        self.row_count = 0
+        self.last_row = None
+
+    # Function to extract the transaction rows of one page
+    def feed_page(self, words, page_num):
+        rows = []
+        anchors = None
+
+        for row in group_rows(words):
+            if self.ending_balance is not None:
+                break  # Nothing after the ending balance belongs to the table
+
+            line = " ".join(word[4] for word in row).upper()
+
+            header = find_header(row, self.column_keywords)
+            if header is not None:
+                anchors = header  # Headers are repeated on every page
+                continue
+
+            if any(keyword in line for keyword in self.ending_keywords):
+                parsed = [parse_amount(word[4]) for word in row]
+                values = [value for value in parsed if value is not None]
+                if values:
+                    self.ending_balance = values[-1][0]
+                continue
+
+            if self.opening_balance is None and self.row_count == 0 and any(keyword in line for keyword in self.opening_keywords):
+                self.opening_balance = parse_row(row, anchors)["balance"]
+                continue
+
+            if anchors is None and not DATE_PATTERN.match(row[0][4]):
+                continue  # Text before the table
+
+            entry = parse_row(row, anchors)
+            if entry["date"] is None:
+                # A row without a date continues the description of the transaction above it
+                if self.last_row is not None and entry["amount"] is None and entry["balance"] is None:
+                    self.last_row["description"] = f"{self.last_row['description']} {entry['description']}".strip()
+                continue
+
+            if entry["amount"] is None:
+                # A dated balance without an amount is the balance brought forward
+                if self.opening_balance is None and self.row_count == 0 and entry["balance"] is not None:
+                    self.opening_balance = entry["balance"]
+                continue
+
+            entry["page"] = page_num
+            rows.append(entry)
+            self.row_count += 1
+            self.last_row = entry
+
+        return rows
+
+
+def extract_transaction_table(pdf_path, template=None):
+    """
+    Recovers the transaction table of a statement from the PDF's word coordinates (see TableExtractor).
+
+    Parameters:
+        pdf_path (str | DocumentSession): Path to the input PDF file, or a shared document session.
+        template (StatementTemplate): Bank template to read the table with.
+
+    Returns:
+        dict: {"rows": [{"page", "date", "description", "amount", "balance", "amount_signed"}],
+               "opening_balance": float | None, "ending_balance": float | None}
+    """
+    extractor = TableExtractor(template)
+    rows = []
+
+    with open_session(pdf_path) as session:
+        for page_num in range(session.page_count):
+            rows.extend(extractor.feed_page(session.words(page_num), page_num))
+
+    return {"rows": rows, "opening_balance": extractor.opening_balance, "ending_balance": extractor.ending_balance}
+
+
+class RunningBalanceVerifier:
+    """
+    Checks every row's printed balance against the opening balance plus the running
+    total of the amounts, with one cumulative sum over integer cents per batch of rows.
+    Rows can be fed in batches (e.g. one page at a time); the running total carries over.
+
+    A tampered amount shifts the difference between the printed and the computed balance
+    from that row onwards, so only the row where that difference changes is reported, not
+    every row after it. A tampered printed balance alone shifts the difference at its row
+    and shifts it straight back at the next printed balance; that pair of equal and opposite
+    steps is reported as one offending row, the altered one.
+
+    Rows with amount_signed False (an amount printed without a sign in a single amount column)
+    take their direction from the change in the printed balance, so only their size is checked;
+    one without a printed balance on its own row or the row before is counted as a credit.
+
+    Parameters:
+        opening_balance (float): Balance before the first row.
+    """
+
+    def __init__(self, opening_balance):
+        self.expected = int(round(opening_balance * 100))
+        self.drift = 0
+        self.row_count = 0
+        self.offending_rows = []
+        self._last_balance = self.expected  # Balance printed on the last row (or the opening balance), in cents; None if unprinted
+        self._printed_count = 0
+        self._pending = None  # (printed index, row, step) of the last step, which the next printed balance may undo
+
+    def update(self, rows):
+        if not rows:
+            return self
+
+        amounts = np.rint(np.array([row["amount"] for row in rows], dtype=float) * 100).astype(np.int64)
+        balances = np.array([np.nan if row["balance"] is None else row["balance"] for row in rows], dtype=float)
+        printed = ~np.isnan(balances)
+        cents = np.where(printed, np.rint(np.nan_to_num(balances) * 100), 0).astype(np.int64)
+
+        # Unsigned amounts follow the direction of the printed balance since the row before
+        unsigned = np.array([not row.get("amount_signed", True) for row in rows])
+        if unsigned.any():
+            previous = np.concatenate(([self._last_balance or 0], cents[:-1]))
+            previous_printed = np.concatenate(([self._last_balance is not None], printed[:-1]))
+            debit = unsigned & printed & previous_printed & (cents < previous)
+            amounts = np.where(debit, -np.abs(amounts), amounts)
+
+        expected = self.expected + np.cumsum(amounts)
+        printed_rows = np.flatnonzero(printed)
+
+        # Drift between printed and computed balance; it steps wherever a row was altered
+        drift = cents[printed] - expected[printed]
+        steps = np.diff(np.concatenate(([self.drift], drift)))
+        self._record_steps(printed_rows, steps)
+
+        if len(drift):
+            self.drift = int(drift[-1])
+        self._last_balance = int(cents[-1]) if printed[-1] else None
+        self.expected = int(expected[-1])
+        self.row_count += len(rows)
+        return self
+
+    # Function to turn the drift steps of a batch into offending rows
+    def _record_steps(self, printed_rows, steps):
+        for position in np.flatnonzero(np.abs(steps) > TOLERANCE_CENTS):
+            index = self._printed_count + int(position)
+            row, step = self.row_count + int(printed_rows[position]), int(steps[position])
+
+            if self._pending is not None:
+                pending_index, pending_row, pending_step = self._pending
+                self.offending_rows.append(pending_row)
+                self._pending = None
+                if index == pending_index + 1 and abs(step + pending_step) <= TOLERANCE_CENTS:
+                    continue  # The balance is right again after an altered one: only that row is reported
+            self._pending = (index, row, step)
+
+        self._printed_count += len(steps)
+        # A step can only be undone by the very next printed balance; anything else settles it now
+        if self._pending is not None and self._pending[0] < self._printed_count - 1:
+            self.offending_rows.append(self._pending[1])
+            self._pending = None
+
+    def result(self, ending_balance=None):
+        offending_rows = self.offending_rows + ([self._pending[1]] if self._pending is not None else [])
+        tallies = self.row_count > 0 and not offending_rows
+        if ending_balance is not None:
+            tallies = tallies and abs(self.expected - int(round(ending_balance * 100))) <= TOLERANCE_CENTS
+
+        return {
+            "balance_tallies": bool(tallies),
+            "offending_rows": offending_rows,
+            "computed_ending_balance": self.expected / 100,
+        }
+
+
+def verify_running_balance(rows, opening_balance, ending_balance=None):
+    """
+    Verifies the running balance of a complete list of rows (see RunningBalanceVerifier).
+
+    Parameters:
+        rows (list): Transaction rows with "amount" and "balance" (balance may be None).
+        opening_balance (float): Balance before the first row.
+        ending_balance (float): Printed ending balance, checked against the final total if given.
+
+    Returns:
+        dict: {"balance_tallies": bool, "offending_rows": list of row indices, "computed_ending_balance": float}
+    """
+    if opening_balance is None or not rows:
+        return {"balance_tallies": False, "offending_rows": [], "computed_ending_balance": None}
+
+    return RunningBalanceVerifier(opening_balance).update(rows).result(ending_balance)
+
+
+# Function to extract the transaction table and verify its running balance
+def check_transaction_table(pdf_path, opening_balance=None, ending_balance=None, template=None):
+    table = extract_transaction_table(pdf_path, template)
+    if table["opening_balance"] is None:
+        table["opening_balance"] = opening_balance
+    if table["ending_balance"] is None:
+        table["ending_balance"] = ending_balance
+
+    table.update(verify_running_balance(table["rows"], table["opening_balance"], table["ending_balance"]))
+    return table
+
+
+# Example usage:
+# table = check_transaction_table("bankstatement.pdf")
+# print(table["balance_tallies"], [table["rows"][i] for i in table["offending_rows"]])
@@ -0,0 +1,260 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from DocumentSession import DocumentSession
+
+# Default per-check timeout in seconds
+DEFAULT_TIMEOUT = 60
+
+
+class Check:
+    """
+    A single verification check to run on the executor.
+
+    Parameters:
+        name (str): Name of the check, used as its key in the verdict.
+        func (callable): The checker to call, e.g. check_qr_code_for_bank.
+        args (tuple): Positional arguments for the checker.
+        kwargs (dict): Keyword arguments for the checker.
+        timeout (float): Seconds to wait for this check before it is reported as timed out.
+        passed (callable): Maps the checker's return value to True/False (default is bool).
+        cleanup (callable): Called once the checker has returned, even if the verdict stopped waiting
+            for it after a timeout (e.g. to close the document it reads); default is nothing.
+    """
+
+    def __init__(self, name, func, args=(), kwargs=None, timeout=DEFAULT_TIMEOUT, passed=bool, cleanup=None):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+        self.timeout = timeout
+        self.passed = passed
+        self.cleanup = cleanup
+
+
+# Function to give every check its own document session, opened from the check's first argument
+# (a path or the PDF's bytes) and closed by the check's cleanup once the checker has returned.
+# PyMuPDF documents must not be used from several threads, so thread-mode checks never share one.
+def with_own_sessions(checks, **session_options):
+    opened = []
+    try:
+        for check in checks:
+            session = DocumentSession(check.args[0], **session_options)
+            opened.append(session)
+            check.args = (session,) + check.args[1:]
+            check.cleanup = session.close
+    except Exception:
+        for session in opened:
+            session.close()
+        raise
+    return checks
+
+
+# Function that runs a checker inside the pool and measures how long it took
+# (module level so that it can be pickled for the process pool)
+def _timed_call(func, args, kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# Function to build the result entry of a check that did not produce a value
+def _check_result(status, error=None, elapsed=None):
+    return {"status": status, "passed": False, "result": None, "error": error, "elapsed": elapsed}
+
+
+def run_checks(checks, mode="thread", max_workers=None, fail_fast=False, cancel_event=None):
+    """
+    Runs independent verification checks concurrently and combines them into one verdict.
+
+    Each check's timeout is counted from the moment the batch is submitted. A check
+    that times out (or is cancelled) is reported as such and no longer waited for;
+    checks that have not started yet are cancelled, a check that is already running
+    finishes in the background because Python cannot interrupt it. A check's cleanup runs
+    only when its checker has actually returned (or was never started), so resources the
+    check uses are never released under a check still running in the background.
+
+    Parameters:
+        checks (list): List of Check objects.
+        mode (str): "thread" to run on a thread pool, "process" to run on a process pool.
+        max_workers (int): Pool size (default is one worker per check, capped at the CPU count).
+        fail_fast (bool): Cancel the remaining checks as soon as one check does not pass.
+        cancel_event (threading.Event): Optional event; once set, all remaining checks are cancelled.
+
+    Returns:
+        dict: {"passed": bool, "elapsed": float, "checks": {name: {"status", "passed", "result", "error", "elapsed"}}}
+            where status is one of "passed", "failed", "error", "timeout" or "cancelled".
+    """
+    if mode == "thread":
+        pool_class = ThreadPoolExecutor
+    elif mode == "process":
+        pool_class = ProcessPoolExecutor
+    else:
+        raise ValueError(f"Unknown executor mode: {mode}")
+
+    if max_workers is None:
+        max_workers = max(1, min(len(checks), os.cpu_count() or 1))
+
+    results = {}
+    start = time.perf_counter()
+    executor = pool_class(max_workers=max_workers)
+
+    submitted = set()
+    try:
+        pending = {}
+        for check in checks:
+            future = executor.submit(_timed_call, check.func, check.args, check.kwargs)
+            submitted.add(check.name)
+            if check.cleanup is not None:
+                future.add_done_callback(lambda _, cleanup=check.cleanup: cleanup())
+            deadline = start + check.timeout if check.timeout is not None else None
+            pending[future] = (check, deadline)
+
+        while pending:
+            now = time.perf_counter()
+
+            # Stop waiting for checks that ran out of time
+            for future, (check, deadline) in list(pending.items()):
+                if deadline is not None and now >= deadline and not future.done():
+                    future.cancel()
+                    results[check.name] = _check_result("timeout", f"Timed out after {check.timeout}s")
+                    del pending[future]
+
+            # Stop waiting for everything if the caller cancelled the run
+            if cancel_event is not None and cancel_event.is_set():
+                for future, (check, _) in pending.items():
+                    future.cancel()
+                    results[check.name] = _check_result("cancelled")
+                pending.clear()
+
+            if not pending:
+                break
+
+            # Wait until the next check finishes or the nearest deadline is reached
+            deadlines = [deadline for _, deadline in pending.values() if deadline is not None]
+            wait_timeout = max(0, min(deadlines) - now) if deadlines else None
+            if cancel_event is not None:
+                wait_timeout = 0.05 if wait_timeout is None else min(wait_timeout, 0.05)
+            done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                check, _ = pending.pop(future)
+                try:
+                    value, elapsed = future.result()
+                except Exception as e:
+                    results[check.name] = _check_result("error", f"{type(e).__name__}: {e}")
+                    continue
+
+                passed = bool(check.passed(value))
+                results[check.name] = {
+                    "status": "passed" if passed else "failed",
+                    "passed": passed,
+                    "result": value,
+                    "error": None,
+                    "elapsed": elapsed,
+                }
+
+            # Cancel the rest once one check has failed, if requested
+            if fail_fast and any(not result["passed"] for result in results.values()):
+                for future, (check, _) in pending.items():
+                    future.cancel()
+                    results[check.name] = _check_result("cancelled")
+                pending.clear()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        # Checks that were never submitted still release what they hold
+        for check in checks:
+            if check.name not in submitted and check.cleanup is not None:
+                check.cleanup()
+
+    # Keep the checks in the order they were given
+    ordered = {check.name: results[check.name] for check in checks}
+    return {
+        "passed": all(result["passed"] for result in ordered.values()),
+        "elapsed": time.perf_counter() - start,
+        "checks": ordered,
+    }
+
+
+# Pass rules for the standard document checks
+def annotations_passed(annotations_count):
+    return "error" not in annotations_count and not annotations_count.get("shapes") and not annotations_count.get("text_boxes")
+
+
+def balance_passed(balance_check_result):
+    return all(balance_check_result.get(key) for key in ("balance_tallies", "name_present", "address_present"))
+
+
+def document_checks(pdf_source, name, address, logo_path="Official Logo/maybank.png", highlighted_pdf_path=None,
+                    similarity_threshold=90, timeout=DEFAULT_TIMEOUT):
+    """
+    Builds the standard annotation, logo, QR and balance checks for one statement.
+
+    Parameters:
+        pdf_source (str | DocumentSession): The statement, as a path or a shared document session.
+        name (str): Applicant's full name.
+        address (str): Applicant's address.
+        logo_path (str): Path to the official bank logo.
+        highlighted_pdf_path (str): Where to save the PDF with highlighted annotations
+            (default is the statement's path with "Scanned" appended).
+        similarity_threshold (int): Minimum logo similarity percentage.
+        timeout (float): Per-check timeout in seconds.
+
+    Returns:
+        list: List of Check objects for run_checks.
+    """
+    # Imported here so that process pool workers only load what the checks need
+    from DocumentAuthenticityAnalysis import highlight_pdf_annotations
+    from BankLogoValidity import main
+    from QRValidation import check_qr_code_for_bank
+    from OCRBalanceCheck import process_bank_statement
+
+    if highlighted_pdf_path is None:
+        pdf_path = pdf_source.name if isinstance(pdf_source, DocumentSession) else pdf_source
+        highlighted_pdf_path = os.path.splitext(pdf_path)[0] + "Scanned.pdf"
+
+    return [
+        Check("annotations", highlight_pdf_annotations, (pdf_source, highlighted_pdf_path),
+              timeout=timeout, passed=annotations_passed),
+        Check("logo", main, (pdf_source, logo_path),
+              {"similarity_threshold": similarity_threshold}, timeout=timeout),
+        Check("qr_code", check_qr_code_for_bank, (pdf_source,), {"page_number": None, "progressive": True},
+              timeout=timeout),
+        Check("balance", process_bank_statement, (pdf_source,), {"name": name, "address": address},
+              timeout=timeout, passed=balance_passed),
+    ]
+
+
+def verify_document(pdf_path, name, address, mode="thread", max_workers=None, **kwargs):
+    """
+    Runs all document checks for one statement concurrently and returns a single verdict.
+
+    In thread mode the statement is read once and every check gets its own document opened
+    from those bytes (PyMuPDF is not thread-safe), closed only after its check has returned;
+    in process mode each worker opens the file itself, since sessions cannot be pickled.
+
+    Parameters:
+        pdf_path (str): Path to the statement PDF.
+        name (str): Applicant's full name.
+        address (str): Applicant's address.
+        mode (str): "thread" or "process".
+        max_workers (int): Pool size.
+        **kwargs: Extra options passed to document_checks (logo_path, timeout, ...).
+
+    Returns:
+        dict: The verdict from run_checks.
+    """
+    if mode == "process":
+        return run_checks(document_checks(pdf_path, name, address, **kwargs), mode, max_workers)
+
+    with open(pdf_path, "rb") as file:
+        data = file.read()
+    kwargs.setdefault("highlighted_pdf_path", os.path.splitext(pdf_path)[0] + "Scanned.pdf")
+    checks = with_own_sessions(document_checks(data, name, address, **kwargs), ocr=True)
+    return run_checks(checks, mode, max_workers)
+
+
+# Example usage:
+# verdict = verify_document("FakeBankStatement.pdf", "John Smith", "No 1, Jalan 1, Taman Satu, 12345, Kedah")
+# print(verdict["passed"], {name: check["status"] for name, check in verdict["checks"].items()})
@@ -12,6 +12,7 @@ from BankLogoValidity import main
 from QRValidation import check_qr_code_for_bank
 from OCRBalanceCheck import process_bank_statement
 from HandwritingTensorflow import unseendata_test
+from VerificationExecutor import Check, run_checks, with_own_sessions
 
 st.set_page_config(layout="wide")
 st.markdown(""" 
@@ -104,8 +105,19 @@ with col2:
             "Name and Address Match User Input"
         ]
 
+        # Run the annotation, logo, QR and balance checks concurrently. Each check opens its own
+        # session (PyMuPDF documents are not thread-safe), which is closed once that check has
+        # returned, whether it passed, failed, raised or was given up on after a timeout
+        verdict = run_checks(with_own_sessions([
+            Check("annotations", highlight_pdf_annotations, ("FakeBankStatement.pdf", "FakeBankStatementScanned.pdf")),
+            Check("logo", main, ("FakeBankStatement.pdf", "Official Logo/maybank.png"), {"similarity_threshold": 90}),
+            Check("qr_code", check_qr_code_for_bank, ("BankStatementQR.pdf",), {"page_number": None, "progressive": True}),
+            Check("balance", process_bank_statement, ("bankstatement.pdf",), {"name": "John Smith", "address": "No 1, Jalan 1, Taman Satu, 12345, Kedah"}),
+        ], ocr=True))
+        checks = verdict["checks"]
+
         # Highlight annotations and get the counts of shapes and text boxes
-        annotations_count = highlight_pdf_annotations("FakeBankStatement.pdf", "FakeBankStatementScanned.pdf")
+        annotations_count = checks["annotations"]["result"] or {}
         shapes_count = annotations_count.get('shapes', 0)
         text_boxes_count = annotations_count.get('text_boxes', 0)
 
@@ -116,21 +128,19 @@ with col2:
             emojis[2] = "❌"  # Change to red X if text boxes are found
 
         # Logo validation
-        logo_valid = main("FakeBankStatement.pdf", "Official Logo/maybank.png", "Extracted Images", similarity_threshold=90)
-        if not logo_valid:
+        if not checks["logo"]["passed"]:
             emojis[3] = "❌"  # Red X if logo is not valid
 
         # QR Code validation
-        qr_valid = check_qr_code_for_bank("BankStatementQR.pdf", page_number=0)
-        if not qr_valid:
+        if not checks["qr_code"]["passed"]:
             emojis[4] = "❌"  # Red X if QR code is invalid
 
         # OCR-based balance check
-        balance_check_result = process_bank_statement("bankstatement.pdf", name="John Smith", address="No 1, Jalan 1, Taman Satu, 12345, Kedah")
-        if not balance_check_result["balance_tallies"]:
+        balance_check_result = checks["balance"]["result"] or {}
+        if not balance_check_result.get("balance_tallies"):
             emojis[5] = "❌"  # Red X if balance check fails
 
-        if not balance_check_result["name_present"] or not balance_check_result["address_present"]:
+        if not balance_check_result.get("name_present") or not balance_check_result.get("address_present"):
             emojis[6] = "❌"  # Red X if name or address is not found
 
         # Create two columns for image and emojis with text
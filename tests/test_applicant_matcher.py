@@ -0,0 +1,43 @@
+from ApplicantMatcher import TokenIndex, match_score
+
+ADDRESS = "No 1, Jalan 1, Taman Satu, 12345, Kedah"
+
+
+def test_abbreviations_and_punctuation_match():
+    assert match_score("... NO. 1 JLN 1 TMN SATU 12345 KEDAH ...", ADDRESS) == 1.0
+
+
+def test_ocr_error_in_a_word_lowers_the_score():
+    assert 0.85 < match_score("NO 1 JLN 1 TMN SATU 12345 KEDHA", ADDRESS) < 1.0
+
+
+def test_different_house_number_does_not_match():
+    assert match_score("...NO 11, JALAN 1, TAMAN SATU, 12345, KEDAH", ADDRESS) == 0.0
+
+
+def test_swapped_numbers_do_not_match():
+    assert match_score("NO 7 JALAN 9 TAMAN SATU", "No 9, Jalan 7, Taman Satu") == 0.0
+
+
+def test_words_out_of_order_lower_the_score():
+    assert match_score("TAMAN SATU KEDAH NO 1 JALAN 1 12345", ADDRESS) < 0.85
+
+
+def test_scattered_tokens_do_not_match():
+    text = "NO 1 TRANSFER TO JALAN 1 ACCOUNT TAMAN FEES SATU 12345 PAYMENT KEDAH"
+
+    assert match_score(text, ADDRESS) < 0.85
+
+
+def test_search_scores_every_document():
+    index = TokenIndex().add("a", "NO 1 JLN 1 TMN SATU 12345 KEDAH").add("b", "NO 2 JLN 1 TMN SATU 12345 KEDAH")
+
+    assert index.search(ADDRESS) == {"a": 1.0}
+
+
+def test_address_among_many_common_tokens():
+    rows = [f"01/10 TRANSFER NO {n % 97} JLN {n % 50} TMN MAJU {n}.00" for n in range(2000)]
+    rows.insert(1000, "NO 1 JLN 1 TMN SATU 12345 KEDAH")
+
+    assert match_score(" ".join(rows), ADDRESS) == 1.0
+    assert match_score(" ".join(rows), "Jalan Satu Taman Maju") < 0.85
@@ -0,0 +1,65 @@
+import os
+
+import cv2
+import numpy as np
+
+from HandwritingSegmentation import segment_handwriting
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Text Recognition Sample.jpg")
+
+
+# Function to count the characters of each word, line by line
+def word_lengths(segments):
+    return [int(np.sum((segments["lines"] == line) & (segments["words"] == word)))
+            for line, word in sorted(set(zip(segments["lines"].tolist(), segments["words"].tolist())))]
+
+
+def test_sample_is_split_into_words():
+    segments = segment_handwriting(cv2.imread(SAMPLE_PATH))
+
+    # "The quick brown fox jumps over the lazy dog"; the arm of the k in "quick" does not touch
+    # its stem at the default threshold, so that word has one crop more than it has letters
+    assert set(segments["lines"].tolist()) == {0}
+    assert word_lengths(segments) == [3, 6, 5, 3, 5, 4, 3, 4, 3]
+
+
+def test_dots_are_joined_to_their_letter():
+    segments = segment_handwriting(cv2.imread(SAMPLE_PATH))
+    boxes = segments["boxes"]
+
+    # The i of "quick" and the j of "jumps" start at their dot, above the x-height of the letters beside them
+    i_box, j_box = boxes[5], boxes[17]
+    assert i_box[1] < boxes[4][1] and i_box[1] + i_box[3] == boxes[4][1] + boxes[4][3]
+    assert j_box[1] < boxes[18][1]
+    assert len(segments["crops"]) == 36
+
+
+def test_synthetic_lines_and_words():
+    image = np.full((200, 600, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "HELLO WORLD", (10, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    cv2.putText(image, "AB CD EF", (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    segments = segment_handwriting(image)
+
+    assert word_lengths(segments) == [5, 5, 2, 2, 2]
+    assert len(segments["crops"]) == 16
+    assert segments["crops"].shape[1:] == (28, 28)
+
+
+def test_single_word_is_not_split():
+    image = np.full((80, 400), 255, dtype=np.uint8)
+    cv2.putText(image, "HELLO", (10, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+
+    assert word_lengths(segment_handwriting(image)) == [5]
+
+
+def test_full_form_with_thousands_of_characters():
+    # 45 lines of 50 identical blocks, more characters than OpenCV's remap takes at once
+    image = np.full((45 * 30 + 20, 50 * 16 + 20), 255, dtype=np.uint8)
+    for line in range(45):
+        for column in range(50):
+            x, y = 10 + column * 16, 10 + line * 30
+            cv2.rectangle(image, (x, y), (x + 9, y + 13), 0, -1)
+    crops = segment_handwriting(image)["crops"]
+
+    assert len(crops) == 45 * 50
+    assert (crops == crops[0]).all() and crops[0].any()
@@ -0,0 +1,12 @@
+import numpy as np
+
+from ImagePreprocessing import denoise
+
+
+def test_tiled_denoising_matches_the_whole_image():
+    rng = np.random.default_rng(0)
+    image = np.full((150, 200), 200, dtype=np.uint8)
+    image[40:110, 30:170] = 60
+    noisy = np.clip(image + rng.normal(0, 20, image.shape), 0, 255).astype(np.uint8)
+
+    assert np.array_equal(denoise(noisy, 30, tile_size=64), denoise(noisy, 30))
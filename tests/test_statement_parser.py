@@ -0,0 +1,44 @@
+import re
+
+from StatementParser import StatementAccumulator, parse_statement
+
+# The expressions the balance check originally ran one at a time
+TRANSACTION = re.compile(r"(\d+\.\d+)([+-])")
+STARTING_BALANCE = re.compile(r"(\d+\.\d+)\s+\d{2}/\d{2}/\d{2}")
+ENDING_BALANCE = re.compile(r"ENDING BALANCE\s*[:\-\s]*([\d,]+\.\d{2})")
+
+
+def test_ending_balance_line_is_also_a_transaction():
+    statement = parse_statement("STATEMENT BALANCE SAVINGS ACCOUNT 50.00 01/10/24 ENDING BALANCE 12.34-")
+
+    assert statement.ending_balance == 12.34
+    assert statement.starting_balance == 50.00
+    assert [(t.amount, t.sign) for t in statement.transactions] == [(12.34, "-")]
+    assert statement.is_bank_statement
+
+
+def test_tokens_match_separate_searches():
+    text = ("STATEMENT DATE : 31/10/24 SAVINGS ACCOUNT 1,000.00 01/10/24 SALARY 2,500.00+ 2500.00+ "
+            "ENDING BALANCE 3,449.90- ENDING BALANCE 1.00 10.10- 0.50+ STATEMENT BALANCE 40.00 31/10/24")
+    statement = parse_statement(text)
+
+    assert [(t.amount, t.sign) for t in statement.transactions] == [(float(a), s) for a, s in TRANSACTION.findall(text)]
+    assert statement.starting_balance == float(STARTING_BALANCE.search(text).group(1))
+    assert statement.ending_balance == float(ENDING_BALANCE.search(text).group(1).replace(",", ""))
+    assert statement.statement_date == "31/10/24"
+
+
+def test_streaming_matches_single_pass():
+    pages = ["STATEMENT DATE : 31/10/24 SAVINGS ACCOUNT 100.00 01/10/24 " + " ".join(f"{i}.25-" for i in range(1, 60)),
+             "MORE 3.00+ ENDING BALANCE 12.34- STATEMENT BALANCE"]
+    statement = parse_statement(" ".join(pages))
+    accumulator = StatementAccumulator(overlap=32)
+    for page in pages:
+        accumulator.feed(page)
+    accumulator.finish()
+
+    assert accumulator.transaction_count == len(statement.transactions)
+    assert abs(accumulator.total_debits - statement.total_debits) < 1e-9
+    assert accumulator.total_credits == statement.total_credits
+    assert accumulator.ending_balance == statement.ending_balance == 12.34
+    assert accumulator.is_bank_statement
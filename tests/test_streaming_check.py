@@ -0,0 +1,50 @@
+import fitz
+
+from OCRBalanceCheck import process_bank_statement, process_bank_statement_streaming
+
+NAME = "John Smith"
+ADDRESS = "No 1, Jalan 1, Taman Satu, 12345, Kedah"
+
+
+# Function to write a statement with the given lines on each page
+def write_statement(path, pages):
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        for number, line in enumerate(lines):
+            page.insert_text((40, 60 + 15 * number), line)
+    doc.save(path)
+    return str(path)
+
+
+def scores(result):
+    return {key: result[key] for key in ("name_score", "address_score", "name_present", "address_present")}
+
+
+def test_both_modes_score_abbreviated_address_alike(tmp_path):
+    path = write_statement(tmp_path / "statement.pdf", [
+        ["STATEMENT BALANCE SAVINGS ACCOUNT 100.00 01/10/24", "JOHN SMITH", "NO. 1 JLN 1 TMN SATU 12345 KEDAH"],
+        ["01/10 TRANSFER 1.00- 99.00"],
+    ])
+    streamed = process_bank_statement_streaming(path, NAME, ADDRESS, ocr_fallback=False)
+
+    assert streamed["address_present"]
+    assert scores(streamed) == scores(process_bank_statement(path, NAME, ADDRESS, ocr_fallback=False))
+
+
+def test_address_split_by_a_page_break_is_found(tmp_path):
+    path = write_statement(tmp_path / "statement.pdf", [
+        ["STATEMENT BALANCE SAVINGS ACCOUNT 100.00 01/10/24", "JOHN SMITH", "NO 1 JALAN 1"],
+        ["TAMAN SATU 12345 KEDAH", "01/10 TRANSFER 1.00- 99.00"],
+    ])
+
+    assert process_bank_statement_streaming(path, NAME, ADDRESS, ocr_fallback=False)["address_score"] == 1.0
+
+
+def test_wrong_house_number_is_rejected_in_both_modes(tmp_path):
+    path = write_statement(tmp_path / "statement.pdf", [
+        ["STATEMENT BALANCE SAVINGS ACCOUNT 100.00 01/10/24", "JOHN SMITH", "NO 11 JALAN 1 TAMAN SATU 12345 KEDAH"],
+    ])
+
+    assert not process_bank_statement_streaming(path, NAME, ADDRESS, ocr_fallback=False)["address_present"]
+    assert not process_bank_statement(path, NAME, ADDRESS, ocr_fallback=False)["address_present"]
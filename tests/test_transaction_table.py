@@ -0,0 +1,84 @@
+from TransactionTable import RunningBalanceVerifier, TableExtractor, find_header, parse_row, verify_running_balance
+
+
+# Function to build rows from (amount, balance) pairs
+def make_rows(entries, signed=True):
+    return [{"amount": amount, "balance": balance, "amount_signed": signed} for amount, balance in entries]
+
+
+# Function to lay out one table line as word boxes, each word starting at the given x
+def make_line(y, words):
+    return [(x, y, x + 8 * len(text), y + 10, text) for x, text in words]
+
+
+ENTRIES = [(-10.00, 90.00), (25.00, 115.00), (-5.00, 110.00), (-40.00, 70.00), (1.50, 71.50)]
+
+
+def test_untouched_statement_tallies():
+    result = verify_running_balance(make_rows(ENTRIES), 100.00, 71.50)
+
+    assert result["balance_tallies"]
+    assert result["offending_rows"] == []
+
+
+def test_altered_balance_is_reported_once():
+    entries = list(ENTRIES)
+    entries[2] = (-5.00, 210.00)
+    result = verify_running_balance(make_rows(entries), 100.00, 71.50)
+
+    assert not result["balance_tallies"]
+    assert result["offending_rows"] == [2]
+
+
+def test_altered_last_balance_is_reported():
+    entries = ENTRIES[:-1] + [(1.50, 171.50)]
+
+    assert verify_running_balance(make_rows(entries), 100.00)["offending_rows"] == [4]
+
+
+def test_altered_amount_is_reported_once():
+    entries = list(ENTRIES)
+    entries[1] = (250.00, 115.00)
+    result = verify_running_balance(make_rows(entries), 100.00)
+
+    assert result["offending_rows"] == [1]
+
+
+def test_altered_balance_across_batches():
+    entries = list(ENTRIES)
+    entries[1] = (25.00, 215.00)
+    rows = make_rows(entries)
+    verifier = RunningBalanceVerifier(100.00).update(rows[:2])
+
+    assert verifier.result()["offending_rows"] == [1]
+    assert verifier.update(rows[2:]).result(71.50)["offending_rows"] == [1]
+
+
+def test_unsigned_amounts_follow_the_balance():
+    rows = make_rows([(abs(amount), balance) for amount, balance in ENTRIES], signed=False)
+
+    assert verify_running_balance(rows, 100.00, 71.50)["balance_tallies"]
+
+    rows[3]["amount"] = 4.00
+    assert verify_running_balance(rows, 100.00)["offending_rows"] == [3]
+
+
+def test_debit_and_credit_columns():
+    header = make_line(100, [(10, "DATE"), (80, "DESCRIPTION"), (300, "DEBIT"), (380, "CREDIT"), (460, "BALANCE")])
+    anchors = find_header(header)
+
+    debit = parse_row(make_line(120, [(10, "01/10"), (80, "TRANSFER"), (300, "10.00"), (460, "90.00")]), anchors)
+    credit = parse_row(make_line(140, [(10, "02/10"), (80, "SALARY"), (380, "25.00"), (460, "115.00")]), anchors)
+
+    assert (debit["amount"], debit["balance"]) == (-10.00, 90.00)
+    assert (credit["amount"], credit["balance"]) == (25.00, 115.00)
+
+    lines = [header,
+             make_line(110, [(10, "01/10"), (80, "BALANCE B/F"), (460, "100.00")]),
+             make_line(120, [(10, "01/10"), (80, "TRANSFER"), (300, "10.00"), (460, "90.00")]),
+             make_line(140, [(10, "02/10"), (80, "SALARY"), (380, "25.00"), (460, "115.00")])]
+    extractor = TableExtractor()
+    rows = extractor.feed_page([word for line in lines for word in line], 0)
+
+    assert extractor.opening_balance == 100.00
+    assert verify_running_balance(rows, extractor.opening_balance, 115.00)["balance_tallies"]